@@ -0,0 +1 @@
+"""Benchmarks of client generation, run from the repository root."""
@@ -0,0 +1,143 @@
+"""Compare sizes of TypeScript clients of each style by methods used.
+
+Run from the repository root, results are printed as JSON:
+
+    python -m benchmarks.bundle --scenario methods-1k --used 1 10 100 1000
+
+Reachable bytes are the source an application using the first `used`
+methods keeps, transport included and models left out as interfaces
+are erased. Decorated clients keep every method of their classes,
+functions keep only the functions imported. If `esbuild` is on the
+path, entries importing those methods are also bundled, minified and
+tree-shaken, with `jsonrpc2-tsclient` left external.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Any
+
+from openrpc import OpenRPC
+
+from benchmarks.specs import get_spec, scenarios
+from openrpcclientgenerator import _typescript
+from openrpcclientgenerator._common import TypeScriptStyle
+from openrpcclientgenerator._options import GenerateOptions
+from openrpcclientgenerator._schema_index import SchemaIndex
+
+url = "http://localhost:8000/api/v1"
+client_pattern = re.compile(r"^export class (\w+)", re.MULTILINE)
+function_pattern = re.compile(r"^export function (\w+)\(", re.MULTILINE)
+
+
+def get_reachable_bytes(src: Path, style: TypeScriptStyle, used: int) -> int:
+    """Get bytes of source kept by an application using `used` methods."""
+    if style is TypeScriptStyle.DECORATED:
+        return len(src.joinpath("client.ts").read_bytes())
+    methods = src.joinpath("methods.ts").read_text()
+    starts = [it.start() for it in function_pattern.finditer(methods)]
+    ends = [*starts[1:], len(methods)]
+    functions = sum(
+        len(methods[start:end].encode()) for start, end in zip(starts[:used], ends)
+    )
+    return len(src.joinpath("transport.ts").read_bytes()) + functions
+
+
+def bundle(src: Path, style: TypeScriptStyle, used: int, esbuild: Path) -> int:
+    """Bundle an entry using `used` methods, returning its size.
+
+    :param src: Directory of the generated client sources.
+    :param style: How the client calls methods.
+    :param used: Number of methods the entry imports.
+    :param esbuild: Absolute path of the esbuild executable.
+    :return: Bytes of the bundle.
+    """
+    if style is TypeScriptStyle.DECORATED:
+        client = client_pattern.findall(src.joinpath("client.ts").read_text())[0]
+        entry = f'export {{{client}}} from "./client.js";\n'
+    else:
+        names = function_pattern.findall(src.joinpath("methods.ts").read_text())
+        entry = f'export {{{", ".join(names[:used])}}} from "./methods.js";\n'
+    entry_path = src.joinpath(f"entry_{used}.ts")
+    entry_path.write_text(entry)
+    out = src.joinpath(f"entry_{used}.js")
+    command = [
+        str(esbuild),
+        str(entry_path),
+        "--bundle",
+        "--minify",
+        "--format=esm",
+        "--external:jsonrpc2-tsclient",
+        f"--outfile={out}",
+        "--log-level=error",
+    ]
+    # No shell is involved, the executable is resolved from `PATH` once
+    # and the other arguments are paths this benchmark created.
+    subprocess.run(command, check=True)  # noqa: S603
+    return len(out.read_bytes())
+
+
+def get_esbuild() -> Path | None:
+    """Get the absolute path of `esbuild` on the path, if any."""
+    found = shutil.which("esbuild")
+    return Path(found).resolve() if found else None
+
+
+def run(scenario: str, used: list[int]) -> dict[str, Any]:
+    """Generate a scenario in each style and measure sizes by methods used."""
+    document = get_spec(scenarios[scenario])
+    rpc = OpenRPC(**document)
+    index = SchemaIndex(rpc)
+    esbuild = get_esbuild()
+    styles: dict[str, Any] = {}
+    for style in TypeScriptStyle:
+        with tempfile.TemporaryDirectory() as out:
+            options = GenerateOptions(ts_style=style)
+            name = _typescript.generate_client(rpc, url, Path(out), options, index)
+            src = Path(out, _typescript.out_dir_name, name, "src")
+            result: dict[str, Any] = {
+                "source_bytes": sum(len(it.read_bytes()) for it in src.glob("*.ts")),
+                "reachable_bytes": {
+                    str(it): get_reachable_bytes(src, style, it) for it in used
+                },
+            }
+            if esbuild:
+                result["bundle_bytes"] = {
+                    str(it): bundle(src, style, it, esbuild) for it in used
+                }
+        styles[style.value] = result
+    return {
+        "scenario": scenario,
+        "methods": len(document["methods"]),
+        "esbuild": esbuild is not None,
+        "styles": styles,
+    }
+
+
+def main() -> None:
+    """Run the benchmark and print results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scenario",
+        choices=list(scenarios),
+        default="methods-1k",
+        help="Scenario to generate, defaults to methods-1k.",
+    )
+    parser.add_argument(
+        "--used",
+        nargs="+",
+        type=int,
+        default=[1, 10, 100, 1000],
+        help="Numbers of methods an application uses.",
+    )
+    args = parser.parse_args()
+    print(json.dumps(run(args.scenario, args.used), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""Time each phase of client generation on synthetic documents.
+
+Run from the repository root, results are printed as JSON:
+
+    python -m benchmarks.generate --scenario methods-1k --repeat 5
+"""
+from __future__ import annotations
+
+import argparse
+import importlib.metadata
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+
+import black
+import caseswitcher
+
+from benchmarks.specs import get_spec, scenarios
+from openrpcclientgenerator import _common as common
+from openrpcclientgenerator import _python, _typescript
+from openrpcclientgenerator._common import FileWriter, Language
+from openrpcclientgenerator._formatting import format_python, Formatting
+from openrpcclientgenerator._loader import validate_document
+from openrpcclientgenerator._options import GenerateOptions
+from openrpcclientgenerator._schema_index import SchemaIndex
+from openrpcclientgenerator._types import TypeResolver
+
+url = "http://localhost:8000/api/v1"
+transport = "HTTP"
+
+
+class Timer:
+    """Accumulate wall time of named phases."""
+
+    def __init__(self) -> None:
+        """Start with no phases timed."""
+        self.seconds: dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a phase, adding to earlier timings of the same phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.seconds[name] = self.seconds.get(name, 0.0) + elapsed
+
+
+def run_python(document: dict[str, Any], out: Path) -> dict[str, float]:
+    """Generate a Python client timing each phase."""
+    timer = Timer()
+    with timer.phase("parse"):
+        rpc = validate_document(document)
+    with timer.phase("types"):
+        index = SchemaIndex(rpc)
+        types = _python.PythonTypes(TypeResolver(index))
+        types.resolver.resolve_all(index.models, rpc.methods)
+    with timer.phase("group"):
+        group = common.get_rpc_group(
+            caseswitcher.to_pascal(rpc.info.title), rpc.methods
+        )
+    with timer.phase("render"):
+        options = GenerateOptions(formatting=Formatting.NONE)
+        client = _python._get_client(group, index.models, url, types, options)
+        models = _python._get_models(index.models, index.cyclic, types, Formatting.NONE)
+        setup = _python._get_setup(rpc.info, transport)
+        readme = _python._get_readme(rpc.info.title, transport)
+    with timer.phase("format"):
+        client = format_python(client, Formatting.BLACK)
+        models = format_python(models, Formatting.BLACK)
+    with timer.phase("io"):
+        writer = FileWriter()
+        writer.write(out.joinpath("client.py"), client)
+        writer.write(out.joinpath("models.py"), models)
+        writer.write(out.joinpath("setup.py"), setup)
+        writer.write(out.joinpath("README.md"), readme)
+    return timer.seconds
+
+
+def run_typescript(document: dict[str, Any], out: Path) -> dict[str, float]:
+    """Generate a TypeScript client timing each phase."""
+    timer = Timer()
+    with timer.phase("parse"):
+        rpc = validate_document(document)
+    with timer.phase("types"):
+        index = SchemaIndex(rpc)
+        types = _typescript.TypeScriptTypes(TypeResolver(index))
+        types.resolver.resolve_all(index.models, rpc.methods)
+    with timer.phase("group"):
+        group = common.get_rpc_group(
+            caseswitcher.to_pascal(rpc.info.title), rpc.methods
+        )
+    with timer.phase("render"):
+        client = _typescript._get_client(group, index.models, url, types)
+        models = _typescript._get_models(index.models, types)
+        index_ts = _typescript._get_index(rpc.info.title, index.models)
+        package_json = _typescript._get_package_json(rpc.info, transport)
+        readme = _typescript._get_readme(rpc.info.title, transport)
+    with timer.phase("io"):
+        writer = FileWriter()
+        writer.write(out.joinpath("client.ts"), client)
+        writer.write(out.joinpath("models.ts"), models)
+        writer.write(out.joinpath("index.ts"), index_ts)
+        writer.write(out.joinpath("package.json"), package_json)
+        writer.write(out.joinpath("README.md"), readme)
+    return timer.seconds
+
+
+runners = {Language.PYTHON: run_python, Language.TYPESCRIPT: run_typescript}
+
+
+def run(scenario: str, language: Language, repeat: int) -> dict[str, Any]:
+    """Benchmark a scenario, reporting the best and median of each phase.
+
+    Each repeat generates into a new directory so writes always create
+    files.
+    """
+    document = get_spec(scenarios[scenario])
+    samples: list[dict[str, float]] = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as out:
+            samples.append(runners[language](document, Path(out)))
+    phases = {
+        name: {
+            "min": min(it[name] for it in samples),
+            "median": statistics.median(it[name] for it in samples),
+        }
+        for name in samples[0]
+    }
+    return {
+        "scenario": scenario,
+        "language": language.value,
+        "methods": len(document["methods"]),
+        "schemas": len(document["components"]["schemas"]),
+        "repeat": repeat,
+        "phases": phases,
+        "total": {
+            "min": min(sum(it.values()) for it in samples),
+            "median": statistics.median(sum(it.values()) for it in samples),
+        },
+    }
+
+
+def get_environment() -> dict[str, str]:
+    """Get versions results depend on."""
+    try:
+        version = importlib.metadata.version("openrpcclientgenerator")
+    except importlib.metadata.PackageNotFoundError:
+        version = "unknown"
+    return {
+        "generator": version,
+        "python": platform.python_version(),
+        "black": black.__version__,
+        "platform": platform.platform(),
+    }
+
+
+def get_regressions(
+    results: list[dict[str, Any]], baseline: list[dict[str, Any]], tolerance: float
+) -> list[str]:
+    """Compare median totals against baseline results.
+
+    :param results: Results of this run.
+    :param baseline: Results of an earlier run.
+    :param tolerance: Allowed slowdown as a fraction of the baseline.
+    :return: Descriptions of benchmarks slower than allowed.
+    """
+    baseline_totals = {
+        (it["scenario"], it["language"]): it["total"]["median"] for it in baseline
+    }
+    regressions = []
+    for result in results:
+        key = (result["scenario"], result["language"])
+        if (before := baseline_totals.get(key)) is None:
+            continue
+        after = result["total"]["median"]
+        if after > before * (1 + tolerance):
+            regressions.append(f"{key[0]} {key[1]}: {before:.3f}s -> {after:.3f}s")
+    return regressions
+
+
+def main() -> None:
+    """Run benchmarks and print results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scenario",
+        nargs="+",
+        choices=list(scenarios),
+        default=list(scenarios),
+        help="Scenarios to run, defaults to all.",
+    )
+    parser.add_argument(
+        "--lang",
+        nargs="+",
+        choices=[it.value for it in Language],
+        default=[it.value for it in Language],
+        help="Languages to generate, defaults to all.",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark.")
+    parser.add_argument("--out", help="Write results to a file instead of stdout.")
+    parser.add_argument(
+        "--baseline", help="Results of an earlier run to check for regressions."
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed slowdown against the baseline, defaults to 0.2 (20%%).",
+    )
+    args = parser.parse_args()
+
+    results = [
+        run(scenario, Language(language), args.repeat)
+        for scenario in args.scenario
+        for language in args.lang
+    ]
+    report = json.dumps(
+        {"environment": get_environment(), "results": results}, indent=2
+    )
+    if args.out:
+        Path(args.out).write_text(report + "\n")
+    else:
+        print(report)
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())["results"]
+        if regressions := get_regressions(results, baseline, args.tolerance):
+            print("Regressions:", *regressions, sep="\n", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
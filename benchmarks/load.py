@@ -0,0 +1,77 @@
+"""Time loading OpenRPC documents into validated models.
+
+Run from the repository root, results are printed as JSON:
+
+    python -m benchmarks.load --scenario methods-10k --repeat 5
+
+`baseline` parses with `json` and validates as `OpenRPC(**document)`,
+`load_openrpc` loads as the CLI does and `trusted` loads content loaded
+before in trusted mode. `pickle` unpickles the validated model, for
+comparison with caching models on disk.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import pickle
+import statistics
+import time
+from typing import Any, Callable
+
+from openrpc import OpenRPC
+
+from benchmarks.specs import get_spec, scenarios
+from openrpcclientgenerator._loader import load_openrpc
+
+
+def get_loaders(source: bytes) -> dict[str, Callable[[], OpenRPC]]:
+    """Get functions loading a document each way."""
+    pickled = pickle.dumps(OpenRPC(**json.loads(source)), pickle.HIGHEST_PROTOCOL)
+    load_openrpc(source, trusted=True)
+    return {
+        "baseline": lambda: OpenRPC(**json.loads(source)),
+        "load_openrpc": lambda: load_openrpc(source),
+        "trusted": lambda: load_openrpc(source, trusted=True),
+        "pickle": lambda: pickle.loads(pickled),  # noqa: S301
+    }
+
+
+def run(scenario: str, repeat: int) -> dict[str, Any]:
+    """Benchmark a scenario, reporting the best and median of each loader."""
+    source = json.dumps(get_spec(scenarios[scenario])).encode()
+    loaders = get_loaders(source)
+    samples: dict[str, list[float]] = {name: [] for name in loaders}
+    for _ in range(repeat):
+        for name, load in loaders.items():
+            start = time.perf_counter()
+            load()
+            samples[name].append(time.perf_counter() - start)
+    results = {
+        name: {"min": min(it), "median": statistics.median(it)}
+        for name, it in samples.items()
+    }
+    return {
+        "scenario": scenario,
+        "bytes": len(source),
+        "repeat": repeat,
+        "loaders": results,
+        "speedup": results["baseline"]["median"] / results["load_openrpc"]["median"],
+    }
+
+
+def main() -> None:
+    """Run the benchmark and print results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scenario",
+        choices=list(scenarios),
+        default="methods-10k",
+        help="Scenario to load, defaults to methods-10k.",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per loader.")
+    args = parser.parse_args()
+    print(json.dumps(run(args.scenario, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Time decoding results into generated models of each backend and codec.
+
+Run from the repository root, results are printed as JSON:
+
+    python -m benchmarks.models --objects 10000 --repeat 5
+"""
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Callable, Generic, TypeVar
+
+import msgspec
+import orjson
+from openrpc import OpenRPC
+from pydantic import TypeAdapter
+
+from openrpcclientgenerator import _python
+from openrpcclientgenerator._common import Codec, ModelBackend
+from openrpcclientgenerator._formatting import Formatting
+from openrpcclientgenerator._schema_index import SchemaIndex
+from openrpcclientgenerator._types import TypeResolver
+
+_T = TypeVar("_T")
+document: dict[str, Any] = {
+    "openrpc": "1.2.6",
+    "info": {"title": "Orders", "version": "1.0.0"},
+    "methods": [
+        {
+            "name": "get_orders",
+            "params": [],
+            "result": {
+                "name": "orders",
+                "schema": {
+                    "type": "array",
+                    "items": {"$ref": "#/components/schemas/Order"},
+                },
+            },
+        }
+    ],
+    "components": {
+        "schemas": {
+            "Status": {"enum": ["open", "paid", "shipped"]},
+            "Item": {
+                "type": "object",
+                "properties": {
+                    "sku": {"type": "string"},
+                    "quantity": {"type": "integer"},
+                    "price": {"type": "number"},
+                },
+            },
+            "Order": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "string", "format": "uuid"},
+                    "created": {"type": "string", "format": "date-time"},
+                    "status": {"$ref": "#/components/schemas/Status"},
+                    "items": {
+                        "type": "array",
+                        "items": {"$ref": "#/components/schemas/Item"},
+                    },
+                    "tags": {"type": "array", "items": {"type": "string"}},
+                    "note": {"type": ["string", "null"]},
+                },
+            },
+        }
+    },
+}
+
+
+class _Response(msgspec.Struct, Generic[_T]):
+    result: _T
+
+
+def get_payload(objects: int) -> bytes:
+    """Get a JSON-RPC response with `objects` orders as its result."""
+    orders = [
+        {
+            "id": str(uuid.UUID(int=i)),
+            "created": "2024-01-01T12:00:00+00:00",
+            "status": ["open", "paid", "shipped"][i % 3],
+            "items": [
+                {"sku": f"sku-{i}-{j}", "quantity": j + 1, "price": 9.99 * j}
+                for j in range(3)
+            ],
+            "tags": ["a", "b"],
+            "note": None if i % 2 else "fragile",
+        }
+        for i in range(objects)
+    ]
+    return json.dumps({"jsonrpc": "2.0", "id": 1, "result": orders}).encode()
+
+
+def load_models(models: ModelBackend, out: Path) -> ModuleType:
+    """Generate the models module of a backend and import it."""
+    rpc = OpenRPC.model_validate(document)
+    index = SchemaIndex(rpc)
+    types = _python.python_types[models](TypeResolver(index))
+    types.resolver.resolve_all(index.models, rpc.methods)
+    path = out.joinpath(f"{models.value}_models.py")
+    path.write_text(
+        _python._get_models(index.models, index.cyclic, types, Formatting.NONE)
+    )
+    spec = importlib.util.spec_from_file_location(f"_bench_{models.value}", path)
+    module = importlib.util.module_from_spec(spec)  # type: ignore[arg-type]
+    # Annotations are resolved through the module.
+    sys.modules[spec.name] = module  # type: ignore[union-attr]
+    spec.loader.exec_module(module)  # type: ignore[union-attr]
+    return module
+
+
+def get_decoders(out: Path) -> dict[str, Callable[[bytes], Any]]:
+    """Get functions decoding a response as generated clients do."""
+    # Classes of generated modules are only known at runtime.
+    pydantic_order: Any = load_models(ModelBackend.PYDANTIC, out).Order
+    adapter = TypeAdapter(list[pydantic_order])
+    msgspec_order: Any = load_models(ModelBackend.MSGSPEC, out).Order
+    decoder = msgspec.json.Decoder(_Response[list[msgspec_order]])
+    return {
+        # Responses are parsed to dicts, then results validated.
+        ModelBackend.PYDANTIC.value: lambda it: adapter.validate_python(
+            json.loads(it)["result"]
+        ),
+        # Responses are parsed from bytes by orjson, then results validated.
+        f"{ModelBackend.PYDANTIC.value}-{Codec.ORJSON.value}": lambda it: (
+            adapter.validate_python(orjson.loads(it)["result"])
+        ),
+        # Responses are decoded straight into structs.
+        ModelBackend.MSGSPEC.value: lambda it: decoder.decode(it).result,
+    }
+
+
+def run(objects: int, repeat: int) -> dict[str, Any]:
+    """Benchmark decoding, reporting the best and median of each decoder."""
+    payload = get_payload(objects)
+    with tempfile.TemporaryDirectory() as out:
+        decoders = get_decoders(Path(out))
+        samples: dict[str, list[float]] = {name: [] for name in decoders}
+        for _ in range(repeat):
+            for name, decode in decoders.items():
+                start = time.perf_counter()
+                decode(payload)
+                samples[name].append(time.perf_counter() - start)
+    backends = {
+        name: {"min": min(it), "median": statistics.median(it)}
+        for name, it in samples.items()
+    }
+    return {
+        "objects": objects,
+        "bytes": len(payload),
+        "repeat": repeat,
+        "backends": backends,
+        "speedup": backends["pydantic"]["median"] / backends["msgspec"]["median"],
+    }
+
+
+def main() -> None:
+    """Run the benchmark and print results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--objects", type=int, default=10_000, help="Orders in the response."
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per backend.")
+    args = parser.parse_args()
+    print(json.dumps(run(args.objects, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Synthetic OpenRPC documents for benchmarks."""
+from __future__ import annotations
+
+import random
+from typing import Any
+
+from pydantic import BaseModel
+
+primitive_schemas: list[dict[str, Any]] = [
+    {"type": "integer"},
+    {"type": "number"},
+    {"type": "string"},
+    {"type": "boolean"},
+    {"type": "string", "format": "date-time"},
+    {"type": "string", "format": "uuid"},
+    {"type": "array", "items": {"type": "string"}},
+    {"type": "object", "additionalProperties": {"type": "integer"}},
+]
+
+
+# Share of schemas referring to a model or enum rather than a primitive.
+ref_ratio = 0.4
+
+
+class SpecOptions(BaseModel):
+    """Size and shape of a generated OpenRPC document."""
+
+    # Number of methods.
+    methods: int
+    # Number of object schemas, each referencing others.
+    models: int = 0
+    # Number of enum schemas.
+    enums: int = 0
+    # Number of `.` separated segments in method names.
+    depth: int = 1
+    # Number of members of a union param added to every method, no
+    # union param if `0`.
+    union_width: int = 0
+    # Seed making documents reproducible.
+    seed: int = 0
+
+
+def get_spec(options: SpecOptions) -> dict[str, Any]:
+    """Get an OpenRPC document with generated methods and schemas.
+
+    :param options: Size and shape of the document.
+    :return: OpenRPC document as JSON.
+    """
+    rng = random.Random(options.seed)
+    names = [f"Model{i}" for i in range(options.models)] + [
+        f"Enum{i}" for i in range(options.enums)
+    ]
+    schemas: dict[str, Any] = {}
+    for i in range(options.models):
+        schemas[f"Model{i}"] = {
+            "type": "object",
+            "properties": {f"field_{j}": _get_schema(rng, names) for j in range(6)},
+            "required": ["field_0", "field_1"],
+        }
+    for i in range(options.enums):
+        schemas[f"Enum{i}"] = {"enum": [f"option-{j}" for j in range(8)]}
+
+    rpc_methods = []
+    for i in range(options.methods):
+        namespace = [
+            f"ns{rng.randrange(8)}_{level}" for level in range(options.depth - 1)
+        ]
+        params = [
+            {"name": f"param_{j}", "schema": _get_schema(rng, names)}
+            for j in range(rng.randrange(4))
+        ]
+        if options.union_width:
+            members = [_get_schema(rng, names) for _ in range(options.union_width)]
+            params.append({"name": "value", "schema": {"anyOf": members}})
+        rpc_methods.append(
+            {
+                "name": ".".join([*namespace, f"method_{i}"]),
+                "params": params,
+                "result": {"name": "result", "schema": _get_schema(rng, names)},
+            }
+        )
+    return {
+        "openrpc": "1.2.6",
+        "info": {"title": "Benchmark API", "version": "1.0.0"},
+        "methods": rpc_methods,
+        "components": {"schemas": schemas},
+    }
+
+
+def _get_schema(rng: random.Random, names: list[str]) -> dict[str, Any]:
+    if names and rng.random() < ref_ratio:
+        return {"$ref": f"#/components/schemas/{rng.choice(names)}"}
+    return rng.choice(primitive_schemas)
+
+
+# Benchmark scenarios by name.
+scenarios = {
+    "methods-10": SpecOptions(methods=10, models=5, enums=2),
+    "methods-1k": SpecOptions(methods=1_000, models=100, enums=20),
+    "methods-10k": SpecOptions(methods=10_000, models=500, enums=50),
+    "deep-namespaces": SpecOptions(methods=1_000, models=50, depth=8),
+    "wide-unions": SpecOptions(methods=500, models=100, union_width=64),
+    "many-enums": SpecOptions(methods=100, models=20, enums=2_000),
+}
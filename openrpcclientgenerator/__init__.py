@@ -5,7 +5,78 @@ Current supported languages:
  - TypeScript
 """
 
-__all__ = ("generate", "Language")
+__all__ = (
+    "Cache",
+    "Codec",
+    "FileWriter",
+    "Formatting",
+    "generate",
+    "generate_many",
+    "GenerateOptions",
+    "get_cache_hints",
+    "is_unchanged",
+    "JobResult",
+    "Language",
+    "load_openrpc",
+    "ModelBackend",
+    "ModelLayout",
+    "PhaseStats",
+    "Profiler",
+    "TypeScriptStyle",
+    "Validation",
+    "WriteStatus",
+)
 
-from openrpcclientgenerator._common import Language
-from openrpcclientgenerator._generator import generate
+import importlib
+from typing import Any, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from openrpcclientgenerator._batch import generate_many, JobResult
+    from openrpcclientgenerator._common import (
+        Cache,
+        Codec,
+        FileWriter,
+        get_cache_hints,
+        Language,
+        ModelBackend,
+        ModelLayout,
+        TypeScriptStyle,
+        Validation,
+        WriteStatus,
+    )
+    from openrpcclientgenerator._formatting import Formatting
+    from openrpcclientgenerator._generator import generate, is_unchanged
+    from openrpcclientgenerator._loader import load_openrpc
+    from openrpcclientgenerator._options import GenerateOptions
+    from openrpcclientgenerator._profiling import PhaseStats, Profiler
+
+# Modules of exported names, imported on first access so that only
+# what is used gets imported.
+_modules = {
+    "Cache": "_common",
+    "Codec": "_common",
+    "FileWriter": "_common",
+    "Formatting": "_formatting",
+    "generate": "_generator",
+    "generate_many": "_batch",
+    "GenerateOptions": "_options",
+    "get_cache_hints": "_common",
+    "is_unchanged": "_generator",
+    "JobResult": "_batch",
+    "Language": "_common",
+    "load_openrpc": "_loader",
+    "ModelBackend": "_common",
+    "ModelLayout": "_common",
+    "PhaseStats": "_profiling",
+    "Profiler": "_profiling",
+    "TypeScriptStyle": "_common",
+    "Validation": "_common",
+    "WriteStatus": "_common",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if (module := _modules.get(name)) is None:
+        msg = f"module {__name__!r} has no attribute {name!r}"
+        raise AttributeError(msg)
+    return getattr(importlib.import_module(f"{__name__}.{module}"), name)
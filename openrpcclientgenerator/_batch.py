@@ -0,0 +1,131 @@
+"""Generate many clients in parallel."""
+from __future__ import annotations
+
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Sequence
+
+from openrpc import OpenRPC
+from pydantic import BaseModel, Field
+
+from openrpcclientgenerator._common import FileWriter, Language, WriteStatus
+from openrpcclientgenerator._generator import generate, get_client_dir
+from openrpcclientgenerator._options import GenerateOptions
+from openrpcclientgenerator._profiling import PhaseStats, Profiler
+from openrpcclientgenerator._templates import get_env, get_template_names
+
+
+class JobResult(BaseModel):
+    """Outcome of generating one client of a batch."""
+
+    spec: int
+    language: Language
+    client_name: str | None = None
+    error: str | None = None
+    seconds: float = 0.0
+    files: dict[str, WriteStatus] = Field(default_factory=dict)
+    phases: dict[str, PhaseStats] = Field(default_factory=dict)
+
+
+class _Job(BaseModel):
+    """Client of a batch to generate."""
+
+    spec: int
+    openrpc: OpenRPC
+    url: str
+    language: Language
+    out: Path
+    options: GenerateOptions
+    profile: bool
+
+
+def generate_many(
+    specs: Sequence[tuple[OpenRPC, str] | tuple[OpenRPC, str, GenerateOptions]],
+    languages: Sequence[Language],
+    out: Path,
+    *,
+    workers: int | None = None,
+    profile: bool = False,
+) -> list[JobResult]:
+    """Generate clients for many documents and languages in parallel.
+
+    A job is run for each combination of spec and language. A failing
+    job does not stop the rest of the batch, its traceback is kept in
+    the job result instead.
+
+    :param specs: OpenRPC document, URL of its RPC server and optionally
+        options its clients are generated with, see `generate`. Their
+        writers and profilers are not used, each job has its own.
+    :param languages: Languages to generate clients in.
+    :param out: Output directory.
+    :param workers: Number of worker processes, defaults to the number
+        of CPUs. Jobs are run in this process if this is `1`.
+    :param profile: Record the time spent in each phase of each job.
+    :return: Job results ordered by spec then language.
+    """
+    jobs = [
+        _Job(
+            spec=i,
+            openrpc=openrpc,
+            url=url,
+            language=language,
+            out=out,
+            options=(options[0] if options else GenerateOptions()).model_copy(
+                update={"writer": None, "profiler": None}
+            ),
+            profile=profile,
+        )
+        for i, (openrpc, url, *options) in enumerate(specs)
+        for language in languages
+    ]
+    results: dict[int, JobResult] = {}
+    # Jobs generating the same client directory would race each other.
+    targets: dict[Path, int] = {}
+    for job_index, job in enumerate(jobs):
+        target = get_client_dir(job.openrpc, job.language, job.url, out)
+        if (first := targets.setdefault(target, job.spec)) != job.spec:
+            error = f"Spec {first} already generates a client at `{target}`."
+            results[job_index] = JobResult(
+                spec=job.spec, language=job.language, error=error
+            )
+
+    pending = [job for job_index, job in enumerate(jobs) if job_index not in results]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(pending) <= 1:
+        _warm_up()
+        done = [_run_job(job) for job in pending]
+    else:
+        with ProcessPoolExecutor(workers, initializer=_warm_up) as executor:
+            done = list(executor.map(_run_job, pending))
+    job_indexes = (it for it in range(len(jobs)) if it not in results)
+    results.update(zip(job_indexes, done))
+    return [results[it] for it in range(len(jobs))]
+
+
+def _run_job(job: _Job) -> JobResult:
+    result = JobResult(spec=job.spec, language=job.language)
+    writer = FileWriter()
+    profiler = Profiler() if job.profile else None
+    options = job.options.model_copy(update={"writer": writer, "profiler": profiler})
+    start = time.perf_counter()
+    try:
+        result.client_name = generate(
+            job.openrpc, job.language, job.url, job.out, options
+        )
+    except Exception:  # noqa: BLE001
+        result.error = traceback.format_exc()
+    result.seconds = time.perf_counter() - start
+    result.files = {str(path): status for path, status in writer.results.items()}
+    if profiler:
+        result.phases = profiler.phases
+    return result
+
+
+def _warm_up() -> None:
+    """Load every template once so each job in a worker can reuse it."""
+    env = get_env()
+    for name in get_template_names():
+        env.get_template(name)
@@ -1,14 +1,25 @@
 """Shared components."""
 from __future__ import annotations
 
+import fnmatch
+import hashlib
+import os
+import shutil
 import string
+import uuid
 from enum import Enum
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterable, Iterator, TYPE_CHECKING
 
 import caseswitcher
-from openrpc import Method
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+
+from openrpcclientgenerator._profiling import phase
+
+if TYPE_CHECKING:
+    from openrpc import Method
+
+chunk_size = 2**16
 
 
 class Language(Enum):
@@ -18,12 +29,154 @@ class Language(Enum):
     TYPESCRIPT = "ts"
 
 
-class RPCGroup(BaseModel):
-    """Group RPC methods by `.` separator."""
+class ModelBackend(Enum):
+    """Classes generated Python models are defined with."""
+
+    PYDANTIC = "pydantic"
+    # `msgspec.Struct`s, decoded straight from response JSON.
+    MSGSPEC = "msgspec"
+
+
+class ModelLayout(Enum):
+    """Modules generated Python models are defined in."""
+
+    # One `models` module.
+    MODULE = "module"
+    # A `models` package with a module per method group of the models
+    # only methods of that group use, and a module of shared models.
+    NAMESPACE = "namespace"
+    # A `models` package with a module per schema.
+    SCHEMA = "schema"
+
+
+class TypeScriptStyle(Enum):
+    """How generated TypeScript clients call RPC methods."""
+
+    # Classes of method stubs implemented by the `rpcClient` decorator.
+    DECORATED = "decorated"
+    # Classes of methods calling the transport directly, and a function
+    # per method, so bundlers drop the methods that are not used.
+    FUNCTIONS = "functions"
+
+
+class Codec(Enum):
+    """JSON library generated Python clients encode and decode with."""
+
+    JSON = "json"
+    # orjson, requests are encoded and responses parsed as bytes.
+    ORJSON = "orjson"
+
+
+class Validation(Enum):
+    """How generated Python clients turn results into their types."""
+
+    # Validate results into their types.
+    FULL = "full"
+    # Build models of results without validating their fields.
+    CONSTRUCT = "construct"
+    # Return results as parsed from JSON.
+    RAW = "raw"
+
+
+class Cache(BaseModel):
+    """Client-side cache of results of an idempotent method."""
+
+    model_config = ConfigDict(populate_by_name=True)
+
+    # Seconds results are cached for, until evicted if `None`.
+    ttl: float | None = None
+    # Results cached per client, least recently used are evicted first.
+    max_entries: int = Field(128, alias="maxEntries", gt=0)
+
+
+# Directory clients of each language are generated in.
+out_dir_names = {Language.PYTHON: "python", Language.TYPESCRIPT: "typescript"}
+
+
+class RPCGroup:
+    """Methods of a client grouped by `.` in their names, as a trie."""
+
+    __slots__ = ("name", "methods", "child_groups")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        # `openrpc.Method`s by identifier, openrpc is only imported
+        # once a client is generated.
+        self.methods: dict[str, Any] = {}
+        self.child_groups: dict[str, RPCGroup] = {}
+
+    def __repr__(self) -> str:
+        return f"RPCGroup({self.name!r})"
+
+    def iter_methods(self) -> Iterator[tuple[tuple[str, ...], Any]]:
+        """Get each method of this group and its child groups by path.
+
+        Paths are identifiers of groups and the method, e.g.
+        `("math", "add")` for `math.add`.
+        """
+        for name, method in self.methods.items():
+            yield (name,), method
+        for group_name, group in self.child_groups.items():
+            for path, method in group.iter_methods():
+                yield (group_name, *path), method
+
+
+class _IdentifierTable(dict[int, int]):
+    """Translation table replacing characters invalid in identifiers."""
+
+    def __missing__(self, char: int) -> int:
+        # Each character is looked up once, then cached.
+        self[char] = underscore = ord("_")
+        return underscore
+
+
+identifier_table = _IdentifierTable(
+    {ord(it): ord(it) for it in string.ascii_letters + string.digits + "_"}
+)
+
+
+def get_validation(validation: dict[str, Validation], method_name: str) -> Validation:
+    """Get the validation of a method.
+
+    :param validation: Validation of methods by `fnmatch` pattern of
+        their names, the first matching pattern is used.
+    :param method_name: Name of the method.
+    :return: Validation of the method, full if no pattern matches.
+    """
+    for pattern, method_validation in validation.items():
+        if fnmatch.fnmatchcase(method_name, pattern):
+            return method_validation
+    return Validation.FULL
+
+
+def get_cache(cache: dict[str, Cache], method_name: str) -> Cache | None:
+    """Get the result cache of a method.
+
+    :param cache: Caches of methods by `fnmatch` pattern of their
+        names, the first matching pattern is used.
+    :param method_name: Name of the method.
+    :return: Cache of the method, `None` if results are not cached.
+    """
+    for pattern, method_cache in cache.items():
+        if fnmatch.fnmatchcase(method_name, pattern):
+            return method_cache
+    return None
+
+
+def get_cache_hints(document: dict[str, Any]) -> dict[str, Cache]:
+    """Get caches of methods from `x-cache` extensions of an OpenRPC document.
+
+    Parsed documents drop extensions, so hints are read from the raw
+    document, e.g. `{"name": "config.get", "x-cache": {"ttl": 60}}`.
 
-    name: str
-    methods: dict[str, Method] = Field(default_factory=dict)
-    child_groups: dict[str, "RPCGroup"] = Field(default_factory=dict)
+    :param document: OpenRPC document as parsed from JSON.
+    :return: Cache of each method with an `x-cache` extension by name.
+    """
+    return {
+        method["name"]: Cache(**method["x-cache"])
+        for method in document.get("methods", [])
+        if "x-cache" in method
+    }
 
 
 def get_rpc_group(client_name: str, methods: list[Method]) -> RPCGroup:
@@ -35,31 +188,115 @@ def get_rpc_group(client_name: str, methods: list[Method]) -> RPCGroup:
     `math.add` will be `client.math.add` since a child class was made
     for the group.
 
+    Names are made identifiers, see `get_identifier`. Methods whose
+    identifiers collide, such as `a-b` and `a_b`, or name a child group
+    get `_2`, `_3` and so on appended. A method already named its
+    identifier keeps it, others are numbered in order of their names,
+    so identifiers do not depend on the order of methods.
+
     :param client_name: Name of the client. Generated client will be
         `f"{client_name}Client"`.
     :param methods: Methods of the RPC server.
-    :return:
+    :return: Root group of the client.
     """
-    group = RPCGroup(name=client_name)
-    valid = string.ascii_lowercase + string.ascii_uppercase + string.digits + "_"
+    root = RPCGroup(client_name)
+    # Groups by the part of method names before their last `.`.
+    groups: dict[str, RPCGroup] = {}
+    # Methods of each group by identifier, colliding methods share one.
+    grouped: dict[RPCGroup, dict[str, list[Method]]] = {}
     for method in methods:
-        children = method.name.split(".")
-        current_group = group
-        for i, child in enumerate(children):
-            child_name = "".join(c if c in valid else "_" for c in child)
-            if child_name and child_name[0] in string.digits:
-                child_name = f"n{child_name}"
-            child_name = child_name or "method"
-            if i + 1 == len(children):
-                current_group.methods[child_name] = method
-                continue
-            if not current_group.child_groups.get(child_name):
-                new_group = RPCGroup(name=child_name)
-                current_group.child_groups[child_name] = new_group
-            current_group = current_group.child_groups[child_name]
+        if "." in method.name:
+            path, _, name = method.name.rpartition(".")
+            if (group := groups.get(path)) is None:
+                group = groups[path] = _get_child_group(root, path)
+        else:
+            group, name = root, method.name
+        if not name.isascii() or not name.isidentifier():
+            name = get_identifier(name)
+        if (named := grouped.get(group)) is None:
+            named = grouped[group] = {}
+        if (colliding := named.get(name)) is None:
+            named[name] = [method]
+        else:
+            colliding.append(method)
+    for group, named in grouped.items():
+        taken = {*named, *group.child_groups}
+        for name, colliding in named.items():
+            if len(colliding) == 1 and name not in group.child_groups:
+                group.methods[name] = colliding[0]
+            else:
+                _add_methods(group, name, colliding, taken)
+    return root
+
+
+def _get_child_group(root: RPCGroup, path: str) -> RPCGroup:
+    """Get the group of a `.` separated path, adding missing groups."""
+    group = root
+    for part in path.split("."):
+        name = get_identifier(part)
+        if (child := group.child_groups.get(name)) is None:
+            child = group.child_groups[name] = RPCGroup(name)
+        group = child
     return group
 
 
+def _add_methods(
+    group: RPCGroup, name: str, methods: list[Method], taken: set[str]
+) -> None:
+    """Add methods of one identifier to a group, numbering collisions."""
+    methods.sort(key=lambda it: (it.name.rsplit(".", 1)[-1] != name, it.name))
+    number = 2
+    for i, method in enumerate(methods):
+        if i == 0 and name not in group.child_groups:
+            group.methods[name] = method
+            continue
+        while f"{name}_{number}" in taken:
+            number += 1
+        taken.add(f"{name}_{number}")
+        group.methods[f"{name}_{number}"] = method
+
+
+def get_identifier(name: str) -> str:
+    """Get a name as an identifier of ASCII letters, digits and `_`.
+
+    Other characters are replaced with `_`, and names starting with a
+    digit are prefixed with `n`.
+    """
+    if not name.isascii() or not name.isidentifier():
+        name = name.translate(identifier_table)
+        if name[:1].isdigit():
+            name = f"n{name}"
+    return name or "method"
+
+
+def get_client_name(title: str, transport: str) -> str:
+    """Get the name of a generated client project."""
+    return caseswitcher.to_kebab(f"{title}-{transport.lower()}-client")
+
+
+def get_client_dir(title: str, language: Language, url: str, out: Path) -> Path:
+    """Get the directory a client is generated in."""
+    name = get_client_name(title, get_transport(url))
+    return out.joinpath(out_dir_names[language], name)
+
+
+def get_transport(url: str) -> str:
+    """Get the transport of a client from the URL of its server."""
+    return "WS" if url.startswith("ws") else "HTTP"
+
+
+def get_cache_dir() -> Path:
+    """Get the directory of caches kept across runs.
+
+    Set `ORPC_CACHE_DIR` to override the default location.
+    """
+    if cache_dir := os.environ.get("ORPC_CACHE_DIR"):
+        return Path(cache_dir)
+    xdg_cache = os.environ.get("XDG_CACHE_HOME")
+    user_cache = Path(xdg_cache) if xdg_cache else Path.home().joinpath(".cache")
+    return user_cache.joinpath("openrpcclientgenerator")
+
+
 def get_enum_option_name(option: Any) -> str:
     """Get a name for an enum option."""
     if isinstance(option, str):
@@ -74,7 +311,130 @@ def get_enum_value(value: Any) -> str:
     return value
 
 
-def touch_and_write(path: Path, content: str) -> None:
-    """Create a file and write text to it."""
-    path.touch(exist_ok=True)
-    path.write_text(content)
+class WriteStatus(Enum):
+    """Outcome of writing a generated file."""
+
+    CREATED = "created"
+    UPDATED = "updated"
+    UNCHANGED = "unchanged"
+    DELETED = "deleted"
+
+
+class FileWriter:
+    """Write generated files, leaving files with unchanged content as is.
+
+    Files are replaced atomically so readers never see a partially
+    written file. The status of each written path is kept in `results`.
+    """
+
+    def __init__(self) -> None:
+        self.results: dict[Path, WriteStatus] = {}
+
+    def write(self, path: Path, content: str) -> WriteStatus:
+        """Write text to a file if it differs from the current content."""
+        data = content.encode()
+        with phase("write"):
+            status = _get_write_status(
+                path, len(data), lambda: hashlib.sha256(data).digest()
+            )
+            if status is not WriteStatus.UNCHANGED:
+                _replace(path, data)
+        self.results[path] = status
+        return status
+
+    def write_stream(self, path: Path, chunks: Iterable[str]) -> WriteStatus:
+        """Write text to a file chunk by chunk if it differs.
+
+        Chunks are written to a temporary file as they are produced,
+        which replaces the file only if the content changed.
+        """
+        temp_path = _get_temp_path(path)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with temp_path.open("xb") as file:
+                for chunk in chunks:
+                    data = chunk.encode()
+                    digest.update(data)
+                    size += len(data)
+                    file.write(data)
+            with phase("write"):
+                status = _get_write_status(path, size, digest.digest)
+                if status is WriteStatus.UNCHANGED:
+                    temp_path.unlink()
+                else:
+                    _replace_with(path, temp_path)
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+        self.results[path] = status
+        return status
+
+    def delete(self, path: Path) -> None:
+        """Delete a file or a directory of files no longer generated.
+
+        Directories are moved out of the way before their files are
+        deleted, so importers never see a partially deleted package.
+        """
+        if not path.exists():
+            return
+        with phase("write"):
+            if not path.is_dir():
+                path.unlink()
+                self.results[path] = WriteStatus.DELETED
+                return
+            temp_path = _get_temp_path(path)
+            path.rename(temp_path)
+            for it in temp_path.rglob("*"):
+                if it.is_file():
+                    deleted = path.joinpath(it.relative_to(temp_path))
+                    self.results[deleted] = WriteStatus.DELETED
+            shutil.rmtree(temp_path)
+
+    def skip(self, path: Path) -> None:
+        """Record a file as unchanged without comparing its content."""
+        self.results[path] = WriteStatus.UNCHANGED
+
+    def get_paths(self, status: WriteStatus) -> list[Path]:
+        """Get written paths with the given status."""
+        return [path for path, it in self.results.items() if it is status]
+
+
+def _get_write_status(
+    path: Path, size: int, get_digest: Callable[[], bytes]
+) -> WriteStatus:
+    """Compare new content to a file, hashing only if sizes match."""
+    try:
+        current_size = path.stat().st_size
+    except FileNotFoundError:
+        return WriteStatus.CREATED
+    if current_size != size:
+        return WriteStatus.UPDATED
+    digest = hashlib.sha256()
+    with path.open("rb") as file:
+        while chunk := file.read(chunk_size):
+            digest.update(chunk)
+    if digest.digest() != get_digest():
+        return WriteStatus.UPDATED
+    return WriteStatus.UNCHANGED
+
+
+def _replace(path: Path, data: bytes) -> None:
+    temp_path = _get_temp_path(path)
+    try:
+        with temp_path.open("xb") as file:
+            file.write(data)
+        _replace_with(path, temp_path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+
+def _replace_with(path: Path, temp_path: Path) -> None:
+    if path.exists():
+        shutil.copymode(path, temp_path)
+    temp_path.replace(path)
+
+
+def _get_temp_path(path: Path) -> Path:
+    return path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
@@ -0,0 +1,448 @@
+"""Keep a generator process warm, regenerating clients as specs change."""
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import contextlib
+import ctypes
+import ctypes.util
+import importlib
+import json
+import os
+import socket
+import struct
+import sys
+import time
+import traceback
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Iterable, Protocol
+
+from pydantic import BaseModel, Field, ValidationError
+
+from openrpcclientgenerator import _common as common
+from openrpcclientgenerator import _manifest
+from openrpcclientgenerator._generator import backends, generate, is_unchanged
+from openrpcclientgenerator._loader import load_openrpc
+from openrpcclientgenerator._options import GenerateOptions
+
+# Closing a written file, moves, creation and deletion in a directory.
+# Files are often saved by writing a copy and moving it over the original.
+_inotify_mask = 0x8 | 0x40 | 0x80 | 0x100 | 0x200
+_inotify_event = struct.Struct("iIII")
+
+
+def get_socket_path() -> Path:
+    """Get the default path of the daemon socket, in the cache directory."""
+    return common.get_cache_dir().joinpath("daemon.sock")
+
+
+class Target(BaseModel):
+    """Clients generated from an OpenRPC file, with options of `generate`."""
+
+    openrpc: Path
+    url: str
+    languages: list[common.Language]
+    out: Path
+    # Incremental generation, the writer, the source and the base path
+    # are set by the daemon.
+    options: GenerateOptions = Field(default_factory=GenerateOptions)
+
+    @property
+    def key(self) -> tuple[Path, str, Path]:
+        """Identity of the target, one per document, server and output."""
+        return self.openrpc, self.url, self.out
+
+
+class TargetResult(BaseModel):
+    """Outcome of generating the clients of a target."""
+
+    openrpc: str
+    client_names: list[str] = Field(default_factory=list)
+    error: str | None = None
+    seconds: float = 0.0
+    files: dict[str, common.WriteStatus] = Field(default_factory=dict)
+
+
+def run_target(target: Target) -> TargetResult:
+    """Generate the clients of a target incrementally.
+
+    Clients whose document, `$ref`'d files and options are unchanged are
+    found from the raw document without parsing it, so only clients
+    affected by a change are generated again.
+    """
+    result = TargetResult(openrpc=str(target.openrpc))
+    writer = common.FileWriter()
+    start = time.perf_counter()
+    try:
+        source = target.openrpc.read_bytes()
+        document = json.loads(source)
+        options = target.options.model_copy(
+            update={
+                "incremental": True,
+                "writer": writer,
+                "source": source,
+                "base_path": target.openrpc.parent,
+                "cache": common.get_cache_hints(document),
+            }
+        )
+        for language in target.languages:
+            if not is_unchanged(source, language, target.url, target.out, options):
+                # Targets of the same document share its model.
+                openrpc = load_openrpc(source, trusted=True)
+                generate(openrpc, language, target.url, target.out, options)
+            title = document["info"]["title"]
+            client_dir = common.get_client_dir(title, language, target.url, target.out)
+            result.client_names.append(client_dir.name)
+    except Exception:  # noqa: BLE001
+        result.error = traceback.format_exc()
+    result.seconds = time.perf_counter() - start
+    result.files = {str(path): status for path, status in writer.results.items()}
+    return result
+
+
+def get_watched_paths(target: Target) -> set[Path]:
+    """Get the document of a target and the files its `$ref`s point to."""
+    paths = {target.openrpc}
+    try:
+        title = json.loads(target.openrpc.read_bytes())["info"]["title"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return paths
+    for language in target.languages:
+        client_dir = common.get_client_dir(title, language, target.url, target.out)
+        paths.update(map(Path, _manifest.load_manifest(client_dir).sources))
+    return paths
+
+
+class Watcher(Protocol):
+    """Watches files for changes."""
+
+    def watch(self, paths: Iterable[Path]) -> None:
+        """Replace the watched files."""
+
+    async def wait(self) -> set[Path]:
+        """Wait for watched files to change, returning changed files."""
+
+    def close(self) -> None:
+        """Stop watching."""
+
+
+class PollingWatcher:
+    """Watch files by polling their size and modification time.
+
+    :param interval: Seconds between polls.
+    """
+
+    def __init__(self, interval: float = 0.2) -> None:
+        self.interval = interval
+        self._stats: dict[Path, tuple[int, int] | None] = {}
+
+    def watch(self, paths: Iterable[Path]) -> None:
+        """Replace the watched files."""
+        self._stats = {it: self._stats.get(it, _stat(it)) for it in paths}
+
+    async def wait(self) -> set[Path]:
+        """Wait for watched files to change, returning changed files."""
+        while True:
+            await asyncio.sleep(self.interval)
+            changed = set()
+            for path, previous in self._stats.items():
+                if (stat := _stat(path)) != previous:
+                    self._stats[path] = stat
+                    changed.add(path)
+            if changed:
+                return changed
+
+    def close(self) -> None:
+        """Stop watching."""
+
+
+class InotifyWatcher:
+    """Watch files with Linux inotify, by watching their directories.
+
+    :raise OSError: If inotify is not available.
+    """
+
+    def __init__(self) -> None:
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._directories: dict[int, Path] = {}
+        self._paths: set[Path] = set()
+        self._changed: set[Path] = set()
+        self._event = asyncio.Event()
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def watch(self, paths: Iterable[Path]) -> None:
+        """Replace the watched files."""
+        self._paths = set(paths)
+        watched = set(self._directories.values())
+        for directory in {it.parent for it in self._paths} - watched:
+            descriptor = self._libc.inotify_add_watch(
+                self._fd, os.fsencode(directory), _inotify_mask
+            )
+            if descriptor >= 0:
+                self._directories[descriptor] = directory
+
+    async def wait(self) -> set[Path]:
+        """Wait for watched files to change, returning changed files."""
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+            self._loop.add_reader(self._fd, self._read)
+        while not self._changed:
+            self._event.clear()
+            await self._event.wait()
+        changed, self._changed = self._changed, set()
+        return changed
+
+    def close(self) -> None:
+        """Stop watching."""
+        if self._loop is not None:
+            self._loop.remove_reader(self._fd)
+        os.close(self._fd)
+
+    def _read(self) -> None:
+        try:
+            data = os.read(self._fd, 2**16)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            descriptor, _, _, length = _inotify_event.unpack_from(data, offset)
+            offset += _inotify_event.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            if (directory := self._directories.get(descriptor)) and name:
+                path = directory.joinpath(os.fsdecode(name))
+                if path in self._paths:
+                    self._changed.add(path)
+                    self._event.set()
+
+
+def get_watcher() -> Watcher:
+    """Get an inotify watcher on Linux, a polling watcher elsewhere."""
+    if sys.platform.startswith("linux"):
+        with contextlib.suppress(OSError, AttributeError, TypeError):
+            return InotifyWatcher()
+    return PollingWatcher()
+
+
+class Daemon:
+    """Generator process serving requests over a Unix socket.
+
+    Templates, black and formatted fragments stay loaded between
+    requests, so generating again only takes the time of the work
+    itself. Watched targets are generated again when their document or
+    files it refers to change.
+
+    Requests and responses are JSON objects, one per line. Requests have
+    a `command`, `generate` or `watch` with a `target`, `unwatch` with a
+    `target`, `status` or `stop`. Targets are generated one at a time in
+    a worker thread, so requests are answered meanwhile.
+
+    :param socket_path: Path of the socket clients connect to.
+    :param debounce: Seconds to wait for more changes before generating.
+    :param watcher: Watcher of files of watched targets.
+    """
+
+    def __init__(
+        self,
+        socket_path: Path | None = None,
+        debounce: float = 0.05,
+        watcher: Watcher | None = None,
+    ) -> None:
+        self.socket_path = socket_path or get_socket_path()
+        self.debounce = debounce
+        self.watcher = watcher or get_watcher()
+        self.targets: dict[tuple[Path, str, Path], Target] = {}
+        self._paths: dict[tuple[Path, str, Path], set[Path]] = {}
+        self._stopped = asyncio.Event()
+        # A single worker, generation shares caches that aren't thread-safe.
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self._commands: dict[
+            str, Callable[[dict[str, Any]], Awaitable[dict[str, Any]]]
+        ] = {
+            "generate": self._handle_generate,
+            "watch": self._handle_watch,
+            "unwatch": self._handle_unwatch,
+            "status": self._handle_status,
+            "stop": self._handle_stop,
+        }
+
+    async def serve(self) -> None:
+        """Serve requests until a `stop` request.
+
+        :raise RuntimeError: If a daemon already listens on the socket.
+        """
+        if _is_listening(self.socket_path):
+            msg = f"A daemon is already listening on `{self.socket_path}`."
+            raise RuntimeError(msg)
+        _warm_up()
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        # Left behind by a daemon that didn't stop cleanly.
+        self.socket_path.unlink(missing_ok=True)
+        server = await asyncio.start_unix_server(
+            self._handle_connection, path=self.socket_path
+        )
+        print(f"Serving on {self.socket_path}.", file=sys.stderr, flush=True)
+        watch = asyncio.create_task(self._watch())
+        try:
+            async with server:
+                await self._stopped.wait()
+        finally:
+            watch.cancel()
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self.watcher.close()
+            self.socket_path.unlink(missing_ok=True)
+
+    async def handle(self, request: dict[str, Any]) -> dict[str, Any]:
+        """Get the response to a request."""
+        command = request.get("command")
+        handler = self._commands.get(command) if isinstance(command, str) else None
+        if handler is None:
+            return {"error": f"Unknown command `{command}`."}
+        try:
+            return await handler(request)
+        except (KeyError, ValidationError) as error:
+            return {"error": f"Invalid request: {error}"}
+
+    async def _handle_generate(self, request: dict[str, Any]) -> dict[str, Any]:
+        result = await self._run(_get_target(request))
+        return result.model_dump(mode="json")
+
+    async def _handle_watch(self, request: dict[str, Any]) -> dict[str, Any]:
+        target = _get_target(request)
+        result = await self._run(target)
+        self.targets[target.key] = target
+        self._update_paths(target)
+        return result.model_dump(mode="json")
+
+    async def _handle_unwatch(self, request: dict[str, Any]) -> dict[str, Any]:
+        target = _get_target(request)
+        self.targets.pop(target.key, None)
+        self._paths.pop(target.key, None)
+        self.watcher.watch(set().union(*self._paths.values()))
+        return {"targets": len(self.targets)}
+
+    async def _handle_status(self, _request: dict[str, Any]) -> dict[str, Any]:
+        targets = [it.model_dump(mode="json") for it in self.targets.values()]
+        return {"pid": os.getpid(), "targets": targets}
+
+    async def _handle_stop(self, _request: dict[str, Any]) -> dict[str, Any]:
+        self._stopped.set()
+        return {"stopped": True}
+
+    async def _run(self, target: Target) -> TargetResult:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, run_target, target)
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            # Connections end with the daemon, rather than being cancelled.
+            while not self._stopped.is_set() and (line := await reader.readline()):
+                try:
+                    response = await self.handle(json.loads(line))
+                except ValueError as error:
+                    response = {"error": f"Invalid request: {error}"}
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _watch(self) -> None:
+        while True:
+            changed = await self.watcher.wait()
+            # Editors save files in several steps, changes are gathered
+            # until none came for `debounce` seconds.
+            with contextlib.suppress(asyncio.TimeoutError):
+                while True:
+                    changed |= await asyncio.wait_for(
+                        self.watcher.wait(), self.debounce
+                    )
+            for key, paths in list(self._paths.items()):
+                # Targets may be unwatched while others are generated.
+                if paths & changed and (target := self.targets.get(key)):
+                    result = await self._run(target)
+                    if key in self.targets:
+                        self._update_paths(target)
+                    _log(result)
+
+    def _update_paths(self, target: Target) -> None:
+        # Targets may start or stop referring to other files.
+        self._paths[target.key] = get_watched_paths(target)
+        self.watcher.watch(set().union(*self._paths.values()))
+
+
+def send(request: dict[str, Any], socket_path: Path | None = None) -> dict[str, Any]:
+    """Send a request to a running daemon and get its response.
+
+    :param request: Request, see `Daemon`.
+    :param socket_path: Path of the daemon socket.
+    :return: Response of the daemon.
+    :raise ConnectionError: If no daemon listens on the socket.
+    """
+    path = socket_path or get_socket_path()
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        try:
+            connection.connect(str(path))
+        except (FileNotFoundError, ConnectionRefusedError) as error:
+            msg = f"No daemon is listening on `{path}`."
+            raise ConnectionError(msg) from error
+        connection.sendall(json.dumps(request).encode() + b"\n")
+        with connection.makefile("rb") as file:
+            return json.loads(file.readline())
+
+
+def _is_listening(socket_path: Path) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        try:
+            connection.connect(str(socket_path))
+        except OSError:
+            return False
+    return True
+
+
+def _warm_up() -> None:
+    """Import backends and black and load templates before any request."""
+    from openrpcclientgenerator._templates import get_env, get_template_names
+
+    for module in ("black", "openrpc", *backends.values()):
+        importlib.import_module(module)
+    env = get_env()
+    for name in get_template_names():
+        env.get_template(name)
+
+
+def _get_target(request: dict[str, Any]) -> Target:
+    target = Target.model_validate(request["target"])
+    # Relative paths are relative to the working directory of the daemon.
+    target.openrpc = target.openrpc.resolve()
+    target.out = target.out.resolve()
+    return target
+
+
+def _stat(path: Path) -> tuple[int, int] | None:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _log(result: TargetResult) -> None:
+    updated = sum(
+        it is not common.WriteStatus.UNCHANGED for it in result.files.values()
+    )
+    status = "failed" if result.error else f"{updated} files changed"
+    print(
+        f"{result.seconds * 1000:8.1f}ms  {result.openrpc}  {status}",
+        file=sys.stderr,
+        flush=True,
+    )
+    if result.error:
+        print(result.error, file=sys.stderr, flush=True)
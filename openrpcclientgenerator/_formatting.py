@@ -0,0 +1,318 @@
+"""Format generated Python code."""
+from __future__ import annotations
+
+import ast
+import collections
+import functools
+import hashlib
+import re
+import sqlite3
+import textwrap
+from enum import Enum
+from pathlib import Path
+from typing import Iterable, Iterator, TYPE_CHECKING
+
+from openrpcclientgenerator import _common as common
+from openrpcclientgenerator._profiling import phase
+
+if TYPE_CHECKING:
+    import black
+
+line_length = 88
+# Lines at column 0 that continue a statement.
+_continuation = re.compile(r"(else|elif|except|finally)\b")
+# Fragments formatted by this process by key, the least recently used
+# is evicted once there are more than `memo_size`.
+_memo: collections.OrderedDict[str, str] = collections.OrderedDict()
+memo_size = 4096
+
+
+class Formatting(Enum):
+    """Formatting options for generated Python code."""
+
+    # Format whole modules with black.
+    BLACK = "black"
+    # Format each top-level definition and method with black, caching
+    # formatted fragments across runs.
+    FRAGMENT = "fragment"
+    # Use code as emitted by the templates.
+    NONE = "none"
+
+
+class FragmentCache:
+    """Formatted fragments persisted in an SQLite database."""
+
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(path, timeout=30)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS fragments (key TEXT PRIMARY KEY, value TEXT)"
+        )
+        self._new: dict[str, str] = {}
+
+    def get(self, key: str) -> str | None:
+        """Get a formatted fragment by key."""
+        row = self._connection.execute(
+            "SELECT value FROM fragments WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: str) -> None:
+        """Add a formatted fragment, stored when the cache is closed."""
+        self._new[key] = value
+
+    def close(self) -> None:
+        """Store new fragments and close the database."""
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO fragments VALUES (?, ?)", self._new.items()
+            )
+        self._connection.close()
+
+
+def format_python(source: str, formatting: Formatting) -> str:
+    """Format generated Python code."""
+    if formatting is Formatting.NONE:
+        return source
+    with phase("format"):
+        return _format(source, formatting)
+
+
+def format_python_stream(
+    chunks: Iterable[str], formatting: Formatting
+) -> Iterator[str]:
+    """Format generated Python code one top-level definition at a time.
+
+    Output is the same as `format_python`, but only one top-level
+    definition, such as a class, or run of simple statements is held in
+    memory at a time.
+
+    :param chunks: Generated code, split anywhere.
+    :param formatting: How the code is formatted.
+    :return: Formatted code of each fragment with the blank lines
+        preceding it.
+    """
+    if formatting is Formatting.NONE:
+        yield from chunks
+        return
+    import black
+
+    cache = None
+    if formatting is Formatting.FRAGMENT:
+        cache = FragmentCache(common.get_cache_dir().joinpath("fragments.sqlite3"))
+    try:
+        previous_is_def = None
+        for source_blank_lines, lines, is_def in _iter_fragments(chunks):
+            if previous_is_def is None:
+                blank_lines = 0
+            elif is_def or previous_is_def:
+                blank_lines = 2
+            else:
+                blank_lines = min(source_blank_lines, 2)
+            previous_is_def = is_def
+            source = "\n".join(lines) + "\n"
+            with phase("format"):
+                if cache is None:
+                    formatted = black.format_str(source, mode=_get_mode(line_length))
+                else:
+                    body = ast.parse(source).body
+                    formatted = "\n".join(_format_body(lines, body, 0, 0, cache))
+                    formatted += "\n"
+            yield "\n" * blank_lines + formatted
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def _iter_fragments(chunks: Iterable[str]) -> Iterator[tuple[int, list[str], bool]]:
+    """Split code into definitions and runs of simple statements.
+
+    Black's blank lines between simple statements depend on their
+    neighbours, e.g. after imports, so they are formatted together.
+
+    :return: Blank lines before each fragment, its lines and whether it
+        is a definition.
+    """
+    run: list[str] = []
+    run_blank_lines = 0
+    for blank_lines, lines, body in _iter_statements(chunks):
+        if body and isinstance(
+            body[0], (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)
+        ):
+            if run:
+                yield run_blank_lines, run, False
+                run = []
+            yield blank_lines, lines, True
+        elif run:
+            run.extend([""] * blank_lines + lines)
+        else:
+            run_blank_lines, run = blank_lines, lines
+    if run:
+        yield run_blank_lines, run, False
+
+
+def _iter_statements(
+    chunks: Iterable[str],
+) -> Iterator[tuple[int, list[str], list[ast.stmt]]]:
+    """Split code into top-level statements.
+
+    A statement ends before a line starting at column 0 once the lines
+    so far parse, so comments and decorators stay with the statement
+    they precede.
+
+    :return: Blank lines before each statement, its lines and parsed
+        body.
+    """
+    blank_lines = before = 0
+    lines: list[str] = []
+    for line in _iter_lines(chunks):
+        if not line.strip():
+            blank_lines += 1
+            continue
+        if (
+            lines
+            and not line[0].isspace()
+            and not _continuation.match(line)
+            and (body := _parse(lines))
+        ):
+            yield before, lines, body
+            lines = []
+        if lines:
+            lines.extend([""] * blank_lines)
+        else:
+            before = blank_lines
+        blank_lines = 0
+        lines.append(line)
+    if lines:
+        yield before, lines, ast.parse("\n".join(lines)).body
+
+
+def _iter_lines(chunks: Iterable[str]) -> Iterator[str]:
+    pending = ""
+    for chunk in chunks:
+        *lines, pending = (pending + chunk).split("\n")
+        yield from lines
+    if pending:
+        yield pending
+
+
+def _parse(lines: list[str]) -> list[ast.stmt] | None:
+    try:
+        return ast.parse("\n".join(lines)).body
+    except SyntaxError:
+        return None
+
+
+def _format(source: str, formatting: Formatting) -> str:
+    # Black is imported once code is formatted, it is slow to import.
+    import black
+
+    if formatting is Formatting.BLACK:
+        return black.format_str(source, mode=_get_mode(line_length))
+    cache = FragmentCache(common.get_cache_dir().joinpath("fragments.sqlite3"))
+    try:
+        lines = source.splitlines()
+        body = ast.parse(source).body
+        return "\n".join(_format_body(lines, body, 0, 0, cache)) + "\n"
+    finally:
+        cache.close()
+
+
+def _format_body(
+    lines: list[str],
+    body: list[ast.stmt],
+    indent: int,
+    start: int,
+    cache: FragmentCache,
+) -> list[str]:
+    """Format statements of a module or class body.
+
+    Consecutive simple statements are formatted together, definitions
+    are formatted on their own. Classes defining methods or classes are
+    split further so each method is its own fragment. Blank lines
+    between fragments follow black's rules.
+
+    :param lines: Lines of the module source.
+    :param body: Statements to format.
+    :param indent: Indentation of the statements.
+    :param start: Index of the line the body starts at.
+    :param cache: Cache of formatted fragments.
+    :return: Formatted lines.
+    """
+    fragments: list[tuple[list[ast.stmt], bool]] = []
+    for statement in body:
+        is_def = isinstance(
+            statement, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)
+        )
+        if is_def or not fragments or fragments[-1][1]:
+            fragments.append(([statement], is_def))
+        else:
+            fragments[-1][0].append(statement)
+
+    formatted: list[str] = []
+    limit = 1 if indent else 2
+    previous_is_def = False
+    for statements, is_def in fragments:
+        # Comments preceding a statement are part of its fragment.
+        blank_lines = 0
+        while not lines[start].strip():
+            blank_lines += 1
+            start += 1
+        if formatted:
+            if is_def or previous_is_def:
+                blank_lines = limit
+            formatted.extend([""] * min(blank_lines, limit))
+        previous_is_def = is_def
+        statement = statements[-1]
+        end = statement.end_lineno or 0
+        if isinstance(statement, ast.ClassDef) and _has_definitions(statement):
+            # Class headers are kept as emitted by the templates.
+            header_end = _get_first_line(statement.body[0]) - 1
+            formatted.extend(line.rstrip() for line in lines[start:header_end])
+            formatted.extend(
+                _format_body(lines, statement.body, indent + 4, header_end, cache)
+            )
+        else:
+            formatted.extend(_format_fragment(lines[start:end], indent, cache))
+        start = end
+    return formatted
+
+
+def _format_fragment(lines: list[str], indent: int, cache: FragmentCache) -> list[str]:
+    import black
+
+    source = textwrap.dedent("\n".join(lines)) + "\n"
+    fragment_line_length = line_length - indent
+    key = hashlib.sha256(
+        f"{black.__version__}:{fragment_line_length}:{source}".encode()
+    ).hexdigest()
+    if (formatted := _memo.get(key)) is not None:
+        _memo.move_to_end(key)
+    else:
+        if (formatted := cache.get(key)) is None:
+            mode = _get_mode(fragment_line_length)
+            formatted = black.format_str(source, mode=mode)
+            cache.set(key, formatted)
+        _memo[key] = formatted
+        if len(_memo) > memo_size:
+            _memo.popitem(last=False)
+    return textwrap.indent(formatted, " " * indent).splitlines()
+
+
+@functools.cache
+def _get_mode(mode_line_length: int) -> black.Mode:
+    import black
+
+    return black.Mode(magic_trailing_comma=False, line_length=mode_line_length)
+
+
+def _get_first_line(statement: ast.stmt) -> int:
+    decorators = getattr(statement, "decorator_list", [])
+    return min([statement.lineno, *(it.lineno for it in decorators)])
+
+
+def _has_definitions(statement: ast.ClassDef) -> bool:
+    return any(
+        isinstance(it, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef))
+        for it in statement.body
+    )
@@ -1,14 +1,140 @@
 """Client generator top-level."""
+from __future__ import annotations
+
+import contextlib
+import importlib
+import json
 from pathlib import Path
+from types import ModuleType
+from typing import TYPE_CHECKING
+
+from openrpcclientgenerator import _common as common
+from openrpcclientgenerator import _manifest
+from openrpcclientgenerator._common import FileWriter, Language
+from openrpcclientgenerator._options import GenerateOptions
+from openrpcclientgenerator._profiling import phase
+
+if TYPE_CHECKING:
+    from openrpc import OpenRPC
+
+# Backend modules are imported once a client of their language is
+# generated.
+backends = {
+    Language.PYTHON: "openrpcclientgenerator._python",
+    Language.TYPESCRIPT: "openrpcclientgenerator._typescript",
+}
+
+
+def generate(
+    openrpc: OpenRPC,
+    language: Language,
+    url: str,
+    out: Path,
+    options: GenerateOptions | None = None,
+) -> str:
+    """Generate an RPC client.
+
+    :param openrpc: OpenRPC document to generate a client for.
+    :param language: Language of the generated client.
+    :param url: URL of the RPC server.
+    :param out: Output directory.
+    :param options: Options of generation and of the generated client.
+    :return: Name of the generated client.
+    """
+    options = options or GenerateOptions()
+    profiler = options.profiler
+    with profiler.activate() if profiler else contextlib.nullcontext():
+        return _generate(openrpc, language, url, out, options)
+
+
+def is_unchanged(
+    source: bytes,
+    language: Language,
+    url: str,
+    out: Path,
+    options: GenerateOptions | None = None,
+) -> bool:
+    """Check if an incremental run would leave a client as is.
+
+    Only works for clients generated incrementally with `source` given.
+    The document is not parsed into an OpenRPC model, so neither
+    openrpc nor any backend is imported.
+
+    :param source: Raw OpenRPC document.
+    :param options: Options the client would be generated with, its
+        writer records unchanged files as skipped.
+    :return: Whether the client is up-to-date.
+    """
+    options = options or GenerateOptions()
+    title = json.loads(source)["info"]["title"]
+    client_dir = common.get_client_dir(title, language, url, out)
+    output_options = options.get_output_options(language)
+    digest = _manifest.get_source_digest(source, language, url, output_options)
+    manifest = _manifest.load_manifest(client_dir)
+    if not manifest.is_current(digest):
+        return False
+    if options.writer:
+        for path in manifest.get_paths():
+            options.writer.skip(path)
+    return True
+
+
+def _generate(
+    openrpc: OpenRPC,
+    language: Language,
+    url: str,
+    out: Path,
+    options: GenerateOptions,
+) -> str:
+    # Imports openrpc, which is slow to import.
+    from openrpcclientgenerator._schema_index import SchemaIndex
+
+    lang = _get_backend(language)
+    # Backends write with the writer the manifest records results of.
+    writer = options.writer or FileWriter()
+    options = options.model_copy(update={"writer": writer})
+    sync = language is Language.PYTHON and options.sync
+    if sync and common.get_transport(url) != "HTTP":
+        msg = f"Synchronous clients require an HTTP server URL, got `{url}`."
+        raise ValueError(msg)
+    if not options.incremental:
+        with phase("index"):
+            index = SchemaIndex(openrpc, options.base_path)
+        return lang.generate_client(openrpc, url, out, options, index)
+
+    client_dir = get_client_dir(openrpc, language, url, out)
+    client_name = client_dir.name
+    output_options = options.get_output_options(language)
+    with phase("digest"):
+        digest = _manifest.get_spec_digest(openrpc, language, url, output_options)
+    manifest = _manifest.load_manifest(client_dir)
+    source_digest = None
+    if options.source is not None:
+        source_digest = _manifest.get_source_digest(
+            options.source, language, url, output_options
+        )
+    if manifest.is_current(digest):
+        for path in manifest.get_paths():
+            writer.skip(path)
+        if source_digest and manifest.source_digest != source_digest:
+            manifest.source_digest = source_digest
+            _manifest.save_manifest(client_dir, manifest)
+        return client_name
+    with phase("index"):
+        index = SchemaIndex(openrpc, options.base_path)
+    lang.generate_client(openrpc, url, out, options, index)
+    manifest.digest = digest
+    manifest.source_digest = source_digest
+    manifest.record(writer)
+    manifest.record_sources(index.files)
+    _manifest.save_manifest(client_dir, manifest)
+    return client_name
 
-from openrpc import OpenRPC
 
-from openrpcclientgenerator import _python, _typescript
-from openrpcclientgenerator._common import Language
+def get_client_dir(openrpc: OpenRPC, language: Language, url: str, out: Path) -> Path:
+    """Get the directory a client is generated in."""
+    return common.get_client_dir(openrpc.info.title, language, url, out)
 
 
-def generate(openrpc: OpenRPC, language: Language, url: str, out: Path) -> str:
-    """Generate an RPC client."""
-    transport = "WS" if url.startswith("ws") else "HTTP"
-    lang = _python if language is Language.PYTHON else _typescript
-    return lang.generate_client(openrpc, url, transport, out)
+def _get_backend(language: Language) -> ModuleType:
+    return importlib.import_module(backends[language])
@@ -0,0 +1,82 @@
+"""Load OpenRPC documents into validated models."""
+from __future__ import annotations
+
+import contextlib
+import gc
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Iterator, TYPE_CHECKING
+
+from openrpcclientgenerator._profiling import phase
+
+if TYPE_CHECKING:
+    from openrpc import OpenRPC
+
+# Number of models of trusted documents kept per process.
+max_trusted_documents = 16
+# Models of trusted documents by SHA-256 digest of their content, least
+# recently loaded first.
+_trusted: dict[str, OpenRPC] = {}
+
+
+def load_openrpc(source: Path | bytes, *, trusted: bool = False) -> OpenRPC:
+    """Load an OpenRPC document from a file or its content.
+
+    Documents are parsed with orjson if it is installed. A document is
+    validated into its model with the cyclic garbage collector paused,
+    since collections triggered by the many objects validation creates
+    otherwise take most of the time spent loading large documents.
+
+    Trusted documents are validated once per process and content. Their
+    models are kept by digest of their content, and loading the same
+    content again returns the same model without parsing or validating
+    it, so don't mutate them.
+
+    :param source: Path of an OpenRPC document, or its content.
+    :param trusted: Reuse the model of a document loaded before with
+        the same content.
+    :return: Validated OpenRPC model.
+    """
+    if isinstance(source, Path):
+        source = source.read_bytes()
+    if not trusted:
+        return validate_document(_parse(source))
+    digest = hashlib.sha256(source).hexdigest()
+    if (rpc := _trusted.pop(digest, None)) is None:
+        rpc = validate_document(_parse(source))
+    _trusted[digest] = rpc
+    while len(_trusted) > max_trusted_documents:
+        del _trusted[next(iter(_trusted))]
+    return rpc
+
+
+def validate_document(document: dict[str, Any]) -> OpenRPC:
+    """Validate a parsed OpenRPC document into its model."""
+    # Slow to import, only imported once a document is validated.
+    from openrpc import OpenRPC
+
+    with phase("load"), _paused_gc():
+        return OpenRPC.model_validate(document)
+
+
+def _parse(source: bytes) -> dict[str, Any]:
+    with phase("parse"):
+        try:
+            import orjson
+        except ImportError:
+            return json.loads(source)
+        return orjson.loads(source)
+
+
+@contextlib.contextmanager
+def _paused_gc() -> Iterator[None]:
+    # Models of a document don't refer to each other in cycles, so
+    # nothing is left for the collector to find.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
@@ -0,0 +1,170 @@
+"""Manifest of generated files used for incremental generation."""
+from __future__ import annotations
+
+import functools
+import hashlib
+import importlib.metadata
+import json
+from enum import Enum
+from pathlib import Path
+from typing import Any, Iterable, TYPE_CHECKING
+
+from pydantic import BaseModel, Field, PrivateAttr
+
+from openrpcclientgenerator._common import WriteStatus
+
+if TYPE_CHECKING:
+    from openrpc import OpenRPC
+
+    from openrpcclientgenerator._common import FileWriter, Language
+
+manifest_name = ".orpc-manifest.json"
+templates = Path(__file__).parent.joinpath("templates")
+
+
+class FileRecord(BaseModel):
+    """State of a generated file when it was last written."""
+
+    size: int
+    mtime_ns: int
+
+
+class Manifest(BaseModel):
+    """Spec digest, generated files and sources of a client directory.
+
+    Sources are files the spec references with `$ref`. The digest of
+    the raw document the spec was loaded from is kept as well, so an
+    unchanged document is detected without parsing it.
+    """
+
+    digest: str | None = None
+    source_digest: str | None = None
+    files: dict[str, FileRecord] = Field(default_factory=dict)
+    sources: dict[str, FileRecord] = Field(default_factory=dict)
+    _root: Path = PrivateAttr()
+
+    def is_current(self, digest: str) -> bool:
+        """Check that a spec or source digest matches and no file was altered."""
+        return (
+            digest in (self.digest, self.source_digest)
+            and all(
+                self._is_unaltered(self._root.joinpath(name), record)
+                for name, record in self.files.items()
+            )
+            and all(
+                self._is_unaltered(Path(name), record)
+                for name, record in self.sources.items()
+            )
+        )
+
+    def get_paths(self) -> list[Path]:
+        """Get paths of all recorded files."""
+        return [self._root.joinpath(name) for name in self.files]
+
+    def record(self, writer: FileWriter) -> None:
+        """Record the files generated in the client directory.
+
+        Files recorded before that were not generated this time, such as
+        the sync client once `sync` is turned off, are deleted so stale
+        modules can't be imported.
+
+        :param writer: Writer the files were generated with.
+        """
+        previous = self.get_paths()
+        self.files = {}
+        for path, status in writer.results.items():
+            if status is not WriteStatus.DELETED and path.is_relative_to(self._root):
+                name = path.relative_to(self._root).as_posix()
+                self.files[name] = _get_record(path)
+        for path in previous:
+            if path not in writer.results:
+                writer.delete(path)
+
+    def record_sources(self, paths: Iterable[Path]) -> None:
+        """Record the files referenced by the spec."""
+        self.sources = {str(path): _get_record(path) for path in paths}
+
+    @staticmethod
+    def _is_unaltered(path: Path, record: FileRecord) -> bool:
+        if not path.is_file():
+            return False
+        stat = path.stat()
+        return stat.st_size == record.size and stat.st_mtime_ns == record.mtime_ns
+
+
+def _get_record(path: Path) -> FileRecord:
+    stat = path.stat()
+    return FileRecord(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+
+
+def load_manifest(client_dir: Path) -> Manifest:
+    """Load the manifest of a client directory, empty if there is none."""
+    path = client_dir.joinpath(manifest_name)
+    try:
+        manifest = Manifest.model_validate_json(path.read_text())
+    except (OSError, ValueError):
+        manifest = Manifest()
+    manifest._root = client_dir
+    return manifest
+
+
+def save_manifest(client_dir: Path, manifest: Manifest) -> None:
+    """Write the manifest of a client directory."""
+    client_dir.joinpath(manifest_name).write_text(manifest.model_dump_json(indent=2))
+
+
+def get_spec_digest(
+    rpc: OpenRPC, language: Language, url: str, options: dict[str, Any]
+) -> str:
+    """Get a digest of everything that determines generated output.
+
+    Only explicitly set fields are included when canonicalizing the
+    document since the generator treats set and unset fields
+    differently, e.g. `const`.
+    """
+    document = rpc.model_dump(mode="json", by_alias=True, exclude_unset=True)
+    return _get_digest(language, url, options, {"openrpc": document})
+
+
+def get_source_digest(
+    source: bytes, language: Language, url: str, options: dict[str, Any]
+) -> str:
+    """Get a digest of generation inputs with the raw document as is."""
+    source_digest = hashlib.sha256(source).hexdigest()
+    return _get_digest(language, url, options, {"source": source_digest})
+
+
+def _get_digest(
+    language: Language, url: str, options: dict[str, Any], document: dict[str, Any]
+) -> str:
+    spec = {
+        "generator": _get_generator_version(),
+        "templates": get_templates_digest(),
+        "language": language.value,
+        "url": url,
+        "options": {
+            name: value.value if isinstance(value, Enum) else value
+            for name, value in options.items()
+        },
+        **document,
+    }
+    canonical = json.dumps(spec, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+@functools.cache
+def _get_generator_version() -> str:
+    try:
+        return importlib.metadata.version("openrpcclientgenerator")
+    except importlib.metadata.PackageNotFoundError:
+        return "unknown"
+
+
+@functools.cache
+def get_templates_digest() -> str:
+    """Get a digest of all templates."""
+    digest = hashlib.sha256()
+    for path in sorted(templates.rglob("*.j2")):
+        digest.update(path.relative_to(templates).as_posix().encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
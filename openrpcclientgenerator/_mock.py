@@ -0,0 +1,228 @@
+"""Generate mock servers answering methods with synthetic results."""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Callable, ClassVar
+
+from openrpc import OpenRPC, Schema, SchemaType
+
+from openrpcclientgenerator import _common as common
+from openrpcclientgenerator._profiling import phase
+from openrpcclientgenerator._schema_index import SchemaIndex
+from openrpcclientgenerator._templates import get_env
+
+# Examples of string formats, UUIDs are of the version of their format.
+format_examples = {
+    "date": "2024-01-01",
+    "time": "12:00:00",
+    "date-time": "2024-01-01T12:00:00Z",
+    "duration": "PT1S",
+    "email": "user@example.com",
+    "hostname": "example.com",
+    "ipv4": "127.0.0.1",
+    "ipv6": "::1",
+    "uri": "https://example.com",
+    "uuid": "c0ffee00-0000-4000-8000-000000000000",
+    "uuid1": "c0ffee00-0000-1000-8000-000000000000",
+    "uuid3": "c0ffee00-0000-3000-8000-000000000000",
+    "uuid4": "c0ffee00-0000-4000-8000-000000000000",
+    "uuid5": "c0ffee00-0000-5000-8000-000000000000",
+}
+
+
+class _CycleError(Exception):
+    """A value would contain a value of a schema still being built."""
+
+
+class Examples:
+    """Synthesize values conforming to schemas.
+
+    Values are the first of a schema's `examples`, its `default` or
+    `const`, or the first of its `enum`. Other values are the simplest
+    of their type meeting their bounds. Unions take their first member
+    that doesn't refer back to a model being built, such as `null`, and
+    arrays of such models are empty, so recursive models are finite.
+
+    :param index: Index resolving `$ref`s of the schemas.
+    """
+
+    def __init__(self, index: SchemaIndex) -> None:
+        self.index = index
+        # Examples of models not part of reference cycles by name.
+        self._models: dict[str, Any] = {}
+        # Ids of referenced schemas being built.
+        self._building: set[int] = set()
+
+    def __call__(self, schema: SchemaType | None) -> Any:
+        """Get an example of a schema, `None` if none is finite."""
+        try:
+            return self._build(schema)
+        except _CycleError:
+            return None
+
+    def _build(self, schema: SchemaType | None) -> Any:
+        if schema is None or isinstance(schema, bool):
+            return None
+        if _has_given_value(schema):
+            return _get_given_value(schema)
+        if schema.ref:
+            return self._build_ref(schema)
+        if schema.all_of:
+            return self._build_all_of(schema.all_of)
+        if members := schema.any_of or schema.one_of:
+            return self._build_union(members)
+        build = self._builders.get(_get_kind(schema) or "")
+        return build(self, schema) if build else None
+
+    def _build_ref(self, schema: Schema) -> Any:
+        name, target = self.index.resolve(schema)
+        if target is None:
+            return None
+        if name in self._models:
+            return self._models[name]
+        if id(target) in self._building:
+            raise _CycleError
+        self._building.add(id(target))
+        try:
+            value = self._build(target)
+        finally:
+            self._building.discard(id(target))
+        if name is not None and name not in self.index.cyclic:
+            self._models[name] = value
+        return value
+
+    def _build_all_of(self, parts: list[SchemaType]) -> dict[str, Any]:
+        value: dict[str, Any] = {}
+        for it in parts:
+            if isinstance(part := self._build(it), dict):
+                value.update(part)
+        return value
+
+    def _build_union(self, members: list[SchemaType]) -> Any:
+        for member in members:
+            try:
+                return self._build(member)
+            except _CycleError:
+                continue
+        raise _CycleError
+
+    def _build_object(self, schema: Schema) -> dict[str, Any]:
+        if schema.properties:
+            return {name: self._build(it) for name, it in schema.properties.items()}
+        values = schema.additional_properties
+        if values is None or isinstance(values, bool):
+            return {}
+        try:
+            return {"key": self._build(values)}
+        except _CycleError:
+            return {}
+
+    def _build_array(self, schema: Schema) -> list[Any]:
+        if "prefix_items" in schema.model_fields_set:
+            return [self._build(it) for it in schema.prefix_items or []]
+        try:
+            item = self._build(schema.items)
+        except _CycleError:
+            if schema.min_items:
+                raise
+            return []
+        # Unique items can't repeat an item.
+        return [item] * (1 if schema.unique_items else max(schema.min_items or 1, 1))
+
+    def _build_string(self, schema: Schema) -> str:
+        if example := format_examples.get(schema.format or ""):
+            return example
+        value = "string".ljust(schema.min_length or 0, "x")
+        return value[: schema.max_length] if schema.max_length else value
+
+    def _build_integer(self, schema: Schema) -> int:
+        return int(_get_number(schema, 1))
+
+    def _build_number(self, schema: Schema) -> float:
+        return float(_get_number(schema, 0.5))
+
+    def _build_boolean(self, _schema: Schema) -> bool:
+        return True
+
+    # Functions building an example of each type.
+    _builders: ClassVar[dict[str, Callable[[Examples, Schema], Any]]] = {
+        "object": _build_object,
+        "array": _build_array,
+        "string": _build_string,
+        "integer": _build_integer,
+        "number": _build_number,
+        "boolean": _build_boolean,
+    }
+
+
+def _has_given_value(schema: Schema) -> bool:
+    given = schema.examples or schema.enum
+    return bool(given) or bool({"default", "const"} & schema.model_fields_set)
+
+
+def _get_given_value(schema: Schema) -> Any:
+    if schema.examples:
+        return schema.examples[0]
+    if "default" in schema.model_fields_set:
+        return schema.default
+    if "const" in schema.model_fields_set:
+        return schema.const
+    return schema.enum[0] if schema.enum else None
+
+
+def _get_kind(schema: Schema) -> str | None:
+    if isinstance(schema.type, list):
+        types = schema.type
+    else:
+        types = [schema.type] if schema.type else []
+    # Other types make better examples than `null`.
+    kind = next((it for it in types if it != "null"), None)
+    if kind is None and schema.properties:
+        return "object"
+    return kind
+
+
+def _get_number(schema: Schema, step: float) -> float:
+    value = step
+    if schema.minimum is not None:
+        value = max(value, schema.minimum)
+    if schema.exclusive_minimum is not None:
+        value = max(value, schema.exclusive_minimum + step)
+    if schema.maximum is not None:
+        value = min(value, schema.maximum)
+    if schema.exclusive_maximum is not None:
+        value = min(value, schema.exclusive_maximum - step)
+    return value
+
+
+def get_mock_data(rpc: OpenRPC, index: SchemaIndex) -> dict[str, Any]:
+    """Get example params and result of each method by name."""
+    examples = Examples(index)
+    return {
+        "methods": {
+            method.name: {
+                "params": [examples(it.schema_) for it in method.params],
+                "result": examples(method.result.schema_),
+            }
+            for method in rpc.methods
+        }
+    }
+
+
+def write_mock_server(
+    rpc: OpenRPC,
+    index: SchemaIndex,
+    url: str,
+    client_dir: Path,
+    writer: common.FileWriter,
+) -> None:
+    """Write a mock server of a client's API and the data it answers with."""
+    with phase("mock"):
+        data = json.dumps(get_mock_data(rpc, index), indent=2)
+    writer.write(client_dir.joinpath("mock_data.json"), data + "\n")
+    with phase("render:python/mock_server.j2"):
+        template = get_env().get_template("python/mock_server.j2")
+        server = template.render({"title": rpc.info.title, "url": url})
+    # The server does not depend on the document and is already formatted.
+    writer.write(client_dir.joinpath("mock_server.py"), server + "\n")
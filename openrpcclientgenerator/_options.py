@@ -0,0 +1,96 @@
+"""Options of client generation."""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from openrpcclientgenerator._common import (
+    Cache,
+    Codec,
+    FileWriter,
+    Language,
+    ModelBackend,
+    ModelLayout,
+    TypeScriptStyle,
+    Validation,
+)
+from openrpcclientgenerator._formatting import Formatting
+from openrpcclientgenerator._profiling import Profiler
+
+
+class GenerateOptions(BaseModel):
+    """Options of `generate` and of the clients it generates."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    # Skip generation if the document, URL, generator and templates are
+    # unchanged since the last incremental run.
+    incremental: bool = False
+    # Writer of generated files, its `results` tell which files were
+    # created, updated or left unchanged.
+    writer: FileWriter | None = Field(default=None, exclude=True)
+    # Profiler recording the time spent in each phase of generation.
+    profiler: Profiler | None = Field(default=None, exclude=True)
+    # Raw document the OpenRPC model was parsed from, recorded by
+    # incremental runs for `is_unchanged`.
+    source: bytes | None = Field(default=None, exclude=True)
+    # How generated Python code is formatted.
+    formatting: Formatting = Formatting.BLACK
+    # Directory file-relative `$ref`s are resolved against, defaults to
+    # the working directory.
+    base_path: Path | None = None
+    # Stream modules to their files as they are rendered, so memory use
+    # is bounded by the largest top-level definition rather than the
+    # largest module.
+    streaming: bool = False
+    # Also generate a synchronous Python client, only for HTTP servers.
+    sync: bool = False
+    # Classes generated Python models are defined with.
+    models: ModelBackend = ModelBackend.PYDANTIC
+    # How Python clients turn results of methods into their types, by
+    # `fnmatch` pattern of method names. Results are fully validated by
+    # default.
+    validation: dict[str, Validation] = Field(default_factory=dict)
+    # JSON library Python clients encode requests and decode responses
+    # with.
+    codec: Codec = Codec.JSON
+    # Caches of results of idempotent methods by `fnmatch` pattern of
+    # method names, see `get_cache_hints` to read them from `x-cache`
+    # extensions.
+    cache: dict[str, Cache] = Field(default_factory=dict)
+    # Modules generated Python models are defined in. Models of packages
+    # of modules are imported on first use.
+    model_layout: ModelLayout = ModelLayout.MODULE
+    # Compile generated Python modules to bytecode, so they load fast
+    # the first time they are imported.
+    byte_compile: bool = False
+    # How generated TypeScript clients call methods.
+    ts_style: TypeScriptStyle = TypeScriptStyle.DECORATED
+    # Also generate a mock server answering each method with an example
+    # of its result, and a benchmark of the client against it.
+    mock: bool = False
+
+    def get_output_options(self, language: Language) -> dict[str, Any]:
+        """Get options that determine clients generated in a language.
+
+        Incremental runs record a digest of these with the document, so
+        changing any of them generates clients again.
+        """
+        base_path = (self.base_path or Path.cwd()).resolve()
+        options: dict[str, Any] = {"base_path": str(base_path)}
+        options["cache"] = [[k, v.ttl, v.max_entries] for k, v in self.cache.items()]
+        options["mock"] = self.mock
+        if language is Language.PYTHON:
+            options["formatting"] = self.formatting
+            options["sync"] = self.sync
+            options["models"] = self.models
+            # Pattern order matters, the first matching pattern is used.
+            options["validation"] = [[k, v.value] for k, v in self.validation.items()]
+            options["codec"] = self.codec
+            options["model_layout"] = self.model_layout
+            options["byte_compile"] = self.byte_compile
+        if language is Language.TYPESCRIPT:
+            options["style"] = self.ts_style
+        return options
@@ -0,0 +1,85 @@
+"""Timings of generation phases."""
+from __future__ import annotations
+
+import cProfile
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Callable, Iterator
+
+from pydantic import BaseModel
+
+_profiler: ContextVar[Profiler | None] = ContextVar("profiler", default=None)
+
+
+class PhaseStats(BaseModel):
+    """Number of runs and total wall time of a phase."""
+
+    count: int = 0
+    seconds: float = 0.0
+
+
+class Profiler:
+    """Collect timings of generation phases.
+
+    Phases are named by what they do, `parse`, `load`, `digest`,
+    `index`, `types`, `group`, `mock`, `format` and `write`, and
+    `render:<template>` for each template.
+
+    :param callback: Called with the name and wall time of each phase
+        as it finishes.
+    :param profile_path: File to dump cProfile stats of the whole
+        generation to, readable with `pstats`.
+    """
+
+    def __init__(
+        self,
+        callback: Callable[[str, float], None] | None = None,
+        profile_path: Path | None = None,
+    ) -> None:
+        self.callback = callback
+        self.profile_path = profile_path
+        self.phases: dict[str, PhaseStats] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        """Record a run of a phase."""
+        stats = self.phases.setdefault(name, PhaseStats())
+        stats.count += 1
+        stats.seconds += seconds
+        if self.callback:
+            self.callback(name, seconds)
+
+    @contextmanager
+    def activate(self) -> Iterator[Profiler]:
+        """Record phases run in this context."""
+        token = _profiler.set(self)
+        profile_path = self.profile_path
+        profile = cProfile.Profile() if profile_path else None
+        if profile:
+            profile.enable()
+        try:
+            yield self
+        finally:
+            _profiler.reset(token)
+            if profile and profile_path:
+                profile.disable()
+                profile.dump_stats(profile_path)
+
+    def get_report(self) -> dict[str, dict[str, float]]:
+        """Get phase stats ordered by total time, slowest first."""
+        phases = sorted(self.phases.items(), key=lambda it: -it[1].seconds)
+        return {name: stats.model_dump() for name, stats in phases}
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time a phase if a profiler is active."""
+    if (profiler := _profiler.get()) is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profiler.add(name, time.perf_counter() - start)
@@ -1,23 +1,41 @@
 """Generate Python client."""
 from __future__ import annotations
 
+import compileall
+import functools
+import py_compile
 import re
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
 
-import black
 import caseswitcher
-from jinja2 import Environment, FileSystemLoader
-from openrpc import Info, Method, OpenRPC, Schema, SchemaType
+from openrpc import Info, Method, OpenRPC, SchemaType
 
 from openrpcclientgenerator import _common as common
-
-root = Path(__file__).parent
-templates = root.joinpath("templates")
-env = Environment(  # noqa: S701
-    loader=FileSystemLoader(templates), lstrip_blocks=True, trim_blocks=True
+from openrpcclientgenerator import _mock
+from openrpcclientgenerator._profiling import phase
+from openrpcclientgenerator._schema_index import get_components, SchemaIndex
+from openrpcclientgenerator._templates import get_env
+from openrpcclientgenerator._formatting import (
+    format_python,
+    format_python_stream,
+    Formatting,
+)
+from openrpcclientgenerator._options import GenerateOptions
+from openrpcclientgenerator._types import (
+    AnyType,
+    ArrayType,
+    ConstType,
+    MapType,
+    PrimitiveType,
+    RefType,
+    TupleType,
+    TypeFormatter,
+    TypeResolver,
+    UnionType,
 )
-black_mode = black.Mode(magic_trailing_comma=False)
+
+out_dir_name = common.out_dir_names[common.Language.PYTHON]
 type_map = {
     "boolean": "bool",
     "integer": "int",
@@ -29,115 +47,443 @@ type_map = {
 }
 
 
-def generate_client(rpc: OpenRPC, url: str, transport: str, out: Path) -> str:
-    """Generate a Python client."""
+def generate_client(
+    rpc: OpenRPC,
+    url: str,
+    out: Path,
+    options: GenerateOptions | None = None,
+    index: SchemaIndex | None = None,
+) -> str:
+    """Generate a Python client.
+
+    Client and models modules are streamed to their files if
+    `options.streaming`, rendered and formatted one top-level statement
+    at a time instead of as whole modules. A synchronous client is
+    generated alongside the async one in `sync_client.py` if
+    `options.sync`. Models are defined with `options.models`, which
+    also decides how results are decoded. Results of methods are turned
+    into their types as their pattern in `options.validation` tells,
+    see `common.get_validation`. Requests are encoded and responses
+    decoded with `options.codec`. Results of methods matching a pattern
+    in `options.cache` are cached per client. Models are split into
+    modules as `options.model_layout` tells, see `_get_model_modules`.
+    Modules are compiled to bytecode if `options.byte_compile`. A mock
+    server and a benchmark of the client against it are generated if
+    `options.mock`.
+    """
+    options = options or GenerateOptions()
+    transport = common.get_transport(url)
     # Create client directory adn src directory.
     out.mkdir(exist_ok=True)
-    py_out = out.joinpath("python")
+    py_out = out.joinpath(out_dir_name)
     py_out.mkdir(exist_ok=True)
-    client_name = caseswitcher.to_kebab(f"{rpc.info.title}-{transport.lower()}-client")
+    client_name = common.get_client_name(rpc.info.title, transport)
     client_dir = py_out.joinpath(client_name)
     client_dir.mkdir(exist_ok=True)
     src_dir = client_dir.joinpath(client_name.replace("-", "_"))
     src_dir.mkdir(exist_ok=True)
     # Create Python files.
-    schemas = (rpc.components.schemas if rpc.components is not None else {}) or {}
-    client = _get_client(rpc.info.title, rpc.methods, schemas, url, transport)
-    common.touch_and_write(src_dir.joinpath("client.py"), client)
-    models = _get_models(schemas)
-    common.touch_and_write(src_dir.joinpath("models.py"), models)
-    src_dir.joinpath("__init__.py").touch(exist_ok=True)
-    # Create setup and README files.
-    common.touch_and_write(
-        client_dir.joinpath("setup.py"), _get_setup(rpc.info, transport)
+    writer = options.writer or common.FileWriter()
+    options = options.model_copy(update={"writer": writer})
+    if index is None:
+        with phase("index"):
+            index = SchemaIndex(rpc, options.base_path)
+    schemas = index.models
+    types = python_types[options.models](TypeResolver(index))
+    with phase("types"):
+        types.resolver.resolve_all(schemas, rpc.methods)
+    with phase("group"):
+        group = common.get_rpc_group(
+            caseswitcher.to_pascal(rpc.info.title), rpc.methods
+        )
+    context = _get_client_context(group, schemas, url, types, options)
+    for sync in [False, True] if options.sync else [False]:
+        path = src_dir.joinpath("sync_client.py" if sync else "client.py")
+        template = _get_client_template(sync)
+        _write_module(path, template, {**context, "sync": sync}, options)
+    # The models module and package shadow each other, only the one of
+    # the current layout is kept.
+    if options.model_layout is common.ModelLayout.MODULE:
+        writer.delete(src_dir.joinpath("models"))
+        context = _get_models_context(schemas, index.cyclic, types)
+        _write_module(
+            src_dir.joinpath("models.py"), "python/models.j2", context, options
+        )
+    else:
+        writer.delete(src_dir.joinpath("models.py"))
+        _write_models_package(src_dir.joinpath("models"), rpc, index, types, options)
+    # Middleware does not depend on the document and is already formatted.
+    writer.write(
+        src_dir.joinpath("middleware.py"), _render("python/middleware.j2", {}) + "\n"
     )
-    common.touch_and_write(
+    writer.write(src_dir.joinpath("__init__.py"), "")
+    # Create setup and README files.
+    setup = _get_setup(rpc.info, transport, options.models, options.codec)
+    writer.write(client_dir.joinpath("setup.py"), setup)
+    writer.write(
         client_dir.joinpath("README.md"), _get_readme(rpc.info.title, transport)
     )
+    if options.mock:
+        _mock.write_mock_server(rpc, index, url, client_dir, writer)
+        benchmark = _get_benchmark(rpc.info.title, group, transport, options.formatting)
+        writer.write(client_dir.joinpath("benchmark.py"), benchmark)
+    if options.byte_compile:
+        with phase("compile"):
+            # Hash based, so bytecode stays valid when copied with new
+            # modification times, e.g. into container images.
+            compileall.compile_dir(
+                src_dir,
+                quiet=1,
+                invalidation_mode=py_compile.PycInvalidationMode.CHECKED_HASH,
+            )
     return client_name
 
 
+def _write_models_package(
+    models_dir: Path,
+    rpc: OpenRPC,
+    index: SchemaIndex,
+    types: PythonTypes,
+    options: GenerateOptions,
+) -> None:
+    """Write models split into the modules of a package."""
+    models_dir.mkdir(exist_ok=True)
+    shards = {name: name for name in index.models}
+    if options.model_layout is common.ModelLayout.NAMESPACE:
+        shards = _get_namespaces(rpc.methods, index)
+    modules = _get_model_modules(index.models, index.dependencies, shards)
+    model_modules = {
+        caseswitcher.to_pascal(name): module
+        for module, names in modules.items()
+        for name in names
+    }
+    for module, names in modules.items():
+        context = _get_models_context(
+            {name: index.models[name] for name in names},
+            index.cyclic,
+            types,
+            _get_model_imports(names, index.dependencies, model_modules, module),
+        )
+        _write_module(
+            models_dir.joinpath(f"{module}.py"), "python/models.j2", context, options
+        )
+    context = {"model_modules": model_modules}
+    init = format_python(
+        _render("python/models_init.j2", context) + "\n", options.formatting
+    )
+    writer = options.writer or common.FileWriter()
+    writer.write(models_dir.joinpath("__init__.py"), init)
+    # Modules of models that moved or were removed.
+    written = {"__init__", *modules}
+    for path in models_dir.glob("*.py"):
+        if path.stem not in written:
+            writer.delete(path)
+
+
+def _write_module(
+    path: Path, template: str, context: dict[str, Any], options: GenerateOptions
+) -> None:
+    """Render and format a module, streaming it to its file if streaming."""
+    writer = options.writer or common.FileWriter()
+    if options.streaming:
+        chunks = _stream(template, context)
+        writer.write_stream(path, format_python_stream(chunks, options.formatting))
+    else:
+        writer.write(
+            path, format_python(_render(template, context), options.formatting)
+        )
+
+
 def _get_client(
-    title: str,
-    methods: list[Method],
+    group: common.RPCGroup,
     schemas: dict[str, SchemaType],
     url: str,
-    transport: str,
+    types: PythonTypes,
+    options: GenerateOptions | None = None,
 ) -> str:
-    group = common.get_rpc_group(caseswitcher.to_pascal(title), methods)
-    template = env.get_template("python/client_module.j2")
-    context = {
+    """Get the async client module."""
+    options = options or GenerateOptions()
+    context = _get_client_context(group, schemas, url, types, options)
+    return format_python(
+        _render("python/client_module.j2", context), options.formatting
+    )
+
+
+def _get_client_template(sync: bool) -> str:  # noqa: FBT001
+    return "python/sync_client_module.j2" if sync else "python/client_module.j2"
+
+
+def _get_client_context(
+    group: common.RPCGroup,
+    schemas: dict[str, SchemaType],
+    url: str,
+    types: PythonTypes,
+    options: GenerateOptions,
+) -> dict[str, Any]:
+    return {
         "imports": ", ".join(schemas),
-        "transport": transport,
+        "transport": common.get_transport(url),
         "group": group,
         "indent": "",
-        "py_type": py_type,
+        "py_type": types,
         "cs": caseswitcher,
         "url": url,
+        "sync": False,
+        "models": types.model_backend.value,
+        "get_validation": functools.partial(common.get_validation, options.validation),
+        "codec": options.codec.value,
+        "cache": bool(options.cache),
+        "get_cache": functools.partial(common.get_cache, options.cache),
+        "lazy_models": options.model_layout is not common.ModelLayout.MODULE,
     }
-    return black.format_str(template.render(context), mode=black_mode)
 
 
-def _get_models(schemas: dict[str, SchemaType]) -> str:
-    context = {
+def _get_models(
+    schemas: dict[str, SchemaType],
+    cyclic: set[str],
+    types: PythonTypes,
+    formatting: Formatting,
+    imports: dict[str, list[str]] | None = None,
+) -> str:
+    context = _get_models_context(schemas, cyclic, types, imports)
+    return format_python(_render("python/models.j2", context), formatting)
+
+
+def _get_models_context(
+    schemas: dict[str, SchemaType],
+    cyclic: set[str],
+    types: PythonTypes,
+    imports: dict[str, list[str]] | None = None,
+) -> dict[str, Any]:
+    return {
         "schemas": schemas,
-        "py_type": py_type,
+        "model_imports": imports or {},
+        "cyclic": cyclic,
+        "py_type": types,
         "cs": caseswitcher,
+        "models": types.model_backend.value,
         "get_enum_option_name": common.get_enum_option_name,
         "get_enum_value": common.get_enum_value,
     }
-    template = env.get_template("python/models.j2")
-    return black.format_str(template.render(context), mode=black_mode)
 
 
-def _get_setup(info: Info, transport: str) -> str:
+def _get_namespaces(methods: list[Method], index: SchemaIndex) -> dict[str, str]:
+    """Get the namespace of each model.
+
+    Models only used by methods of one group, by their params and
+    results or by models they use, are in the namespace of that group.
+    Other models are in the shared namespace `""`.
+    """
+    shared = ""
+    namespaces: dict[str, str] = {}
+
+    def _use(name: str, namespace: str) -> None:
+        if namespaces.setdefault(name, namespace) != namespace:
+            namespaces[name] = shared
+
+    for method in methods:
+        namespace = method.name.split(".", 1)[0] if "." in method.name else shared
+        for schema in [*(it.schema_ for it in method.params), method.result.schema_]:
+            for name in index.get_dependencies(schema):
+                _use(name, namespace)
+    # Models referring to each other share a namespace, and components
+    # come after the components they use, so users are visited first.
+    for component in reversed(list(get_components(index.dependencies))):
+        used = {namespaces[name] for name in component if name in namespaces}
+        namespace = used.pop() if len(used) == 1 else shared
+        for name in component:
+            namespaces[name] = namespace
+            for dependency in index.dependencies[name]:
+                _use(dependency, namespace)
+    return namespaces
+
+
+def _get_model_modules(
+    schemas: dict[str, SchemaType],
+    dependencies: dict[str, list[str]],
+    shards: dict[str, str],
+) -> dict[str, list[str]]:
+    """Get names of the models of each module of a models package.
+
+    Models are put in the module of their shard. Models of shards that
+    refer to each other are put in one module, so modules only import
+    modules defined before them. Modules are ordered so their
+    dependencies come first, as are their models.
+    """
+    positions = {name: i for i, name in enumerate(schemas)}
+    members: dict[str, list[str]] = {}
+    for name in schemas:
+        members.setdefault(shards[name], []).append(name)
+    graph: dict[str, dict[str, None]] = {shard: {} for shard in members}
+    for name in schemas:
+        for dependency in dependencies.get(name, []):
+            if shards[dependency] != shards[name]:
+                graph[shards[name]][shards[dependency]] = None
+    modules: dict[str, list[str]] = {}
+    for component in get_components({k: list(v) for k, v in graph.items()}):
+        names = [name for shard in component for name in members[shard]]
+        if len(component) > 1:
+            names.sort(key=positions.__getitem__)
+        modules[_get_module_name(component[0], modules)] = names
+    return modules
+
+
+def _get_module_name(shard: str, modules: dict[str, Any]) -> str:
+    # Modules are private, models are imported from the package.
+    name = "_" + (re.sub(r"\W", "_", caseswitcher.to_snake(shard)) or "shared")
+    unique_name, i = name, 1
+    while unique_name in modules:
+        i += 1
+        unique_name = f"{name}{i}"
+    return unique_name
+
+
+def _get_model_imports(
+    names: list[str],
+    dependencies: dict[str, list[str]],
+    model_modules: dict[str, str],
+    module: str,
+) -> dict[str, list[str]]:
+    """Get models a module uses from other modules by module."""
+    imports: dict[str, dict[str, None]] = {}
+    for name in names:
+        for dependency in dependencies.get(name, []):
+            model = caseswitcher.to_pascal(dependency)
+            if (other := model_modules[model]) != module:
+                imports.setdefault(other, {})[model] = None
+    return {other: list(models) for other, models in imports.items()}
+
+
+def _get_setup(
+    info: Info,
+    transport: str,
+    models: common.ModelBackend = common.ModelBackend.PYDANTIC,
+    codec: common.Codec = common.Codec.JSON,
+) -> str:
     context = {
         "project_name": caseswitcher.to_kebab(info.title) + "-client",
         "project_dir": caseswitcher.to_snake(info.title) + "_client",
         "project_title": caseswitcher.to_title(info.title),
         "info": info,
         "transport": transport,
+        "models": models.value,
+        "codec": codec.value,
     }
-    return env.get_template("python/setup.j2").render(context) + "\n"
+    return _render("python/setup.j2", context) + "\n"
 
 
 def _get_readme(rpc_title: str, transport: str) -> str:
-    template = env.get_template("python/readme.j2")
     context = {
         "project_title": caseswitcher.to_title(rpc_title),
         "package_name": caseswitcher.to_snake(rpc_title) + "_client",
         "client_name": caseswitcher.to_pascal(rpc_title),
         "transport": transport,
     }
-    return template.render(context) + "\n"
+    return _render("python/readme.j2", context) + "\n"
+
+
+def _get_benchmark(
+    rpc_title: str, group: common.RPCGroup, transport: str, formatting: Formatting
+) -> str:
+    paths = {
+        method.name: ".".join(
+            [
+                *map(caseswitcher.to_snake, path[:-1]),
+                caseswitcher.to_snake(path[-1]) or "method",
+            ]
+        )
+        for path, method in group.iter_methods()
+    }
+    context = {
+        "title": caseswitcher.to_title(rpc_title),
+        "package": caseswitcher.to_snake(rpc_title) + "_client",
+        "client_name": f"{caseswitcher.to_pascal(group.name)}Client",
+        "transport": transport,
+        "paths": paths,
+        "first_method": next(iter(paths), ""),
+    }
+    return format_python(_render("python/benchmark.j2", context) + "\n", formatting)
+
+
+def _render(name: str, context: dict[str, Any]) -> str:
+    with phase(f"render:{name}"):
+        return get_env().get_template(name).render(context)
+
+
+def _stream(name: str, context: dict[str, Any]) -> Iterator[str]:
+    with phase(f"render:{name}"):
+        template = get_env().get_template(name)
+    return template.generate(context)
+
+
+class PythonTypes(TypeFormatter):
+    """Format schemas as Python type hints."""
+
+    model_backend = common.ModelBackend.PYDANTIC
+
+    def _format_any(self, _node: AnyType) -> str:
+        return "Any"
+
+    def _format_const(self, node: ConstType) -> str:
+        return _get_const_type(node.value)
+
+    def _format_primitive(self, node: PrimitiveType) -> str:
+        if node.name == "string" and node.format:
+            return self._get_str_type(node.format)
+        return type_map.get(node.name, "Any")
+
+    def _format_array(self, node: ArrayType) -> str:
+        collection_type = "set" if node.unique else "list"
+        return f"{collection_type}[{self.format(node.items)}]"
+
+    def _format_tuple(self, node: TupleType) -> str:
+        return f"tuple[{', '.join(self.format(it) for it in node.items)}]"
+
+    def _format_map(self, node: MapType) -> str:
+        return f"dict[str, {self.format(node.values)}]"
+
+    def _format_union(self, node: UnionType) -> str:
+        return " | ".join(self.format(it) for it in node.members)
+
+    def _format_ref(self, node: RefType) -> str:
+        return node.name
+
+    _formatters = {
+        AnyType: _format_any,
+        ConstType: _format_const,
+        PrimitiveType: _format_primitive,
+        ArrayType: _format_array,
+        TupleType: _format_tuple,
+        MapType: _format_map,
+        UnionType: _format_union,
+        RefType: _format_ref,
+    }
+
+    def _get_str_type(self, str_format: str) -> str:
+        return _get_str_type(str_format)
+
+
+class MsgspecTypes(PythonTypes):
+    """Format schemas as Python type hints msgspec can decode."""
+
+    model_backend = common.ModelBackend.MSGSPEC
+
+    def _get_str_type(self, str_format: str) -> str:
+        # msgspec has no UUID version types.
+        if str_format.startswith("uuid"):
+            return "UUID"
+        return _get_str_type(str_format)
+
+
+python_types = {
+    common.ModelBackend.PYDANTIC: PythonTypes,
+    common.ModelBackend.MSGSPEC: MsgspecTypes,
+}
 
 
 def py_type(schema: SchemaType | None) -> str:
     """Get Python type from JSON Schema type."""
-    if schema is None or isinstance(schema, bool):
-        return "Any"
-    if "const" in schema.model_fields_set:
-        return _get_const_type(schema.const)
-    if schema.type:
-        return _get_schema_from_type(schema)
-    if schema_list := schema.all_of or schema.any_of or schema.one_of:
-        return " | ".join(py_type(it) for it in schema_list)
-    if schema.ref:
-        return re.sub(r"#/.*/(.*)", r"\1", schema.ref)
-
-    return "Any"
-
-
-def _get_schema_from_type(schema: Schema) -> str:
-    if schema.type == "array":
-        return _get_array_type(schema)
-    if schema.type == "object":
-        return f"dict[str, {py_type(schema.additional_properties)}]"
-    if isinstance(schema.type, list):
-        return " | ".join(type_map[it] for it in schema.type)
-    if schema.type == "string" and schema.format:
-        return _get_str_type(schema.format)
-    return type_map[schema.type]
+    return PythonTypes()(schema)
 
 
 def _get_str_type(str_format: str) -> str:
@@ -158,13 +504,3 @@ def _get_str_type(str_format: str) -> str:
 def _get_const_type(const_value: Any) -> str:
     const = f'"{const_value}"' if isinstance(const_value, str) else const_value
     return f"Literal[{const}]"
-
-
-def _get_array_type(schema: Schema) -> str:
-    if "prefix_items" in schema.model_fields_set:
-        types = ", ".join(
-            py_type(prefix_item) for prefix_item in schema.prefix_items or []
-        )
-        return f"tuple[{types}]"
-    collection_type = "set" if schema.unique_items else "list"
-    return f"{collection_type}[{py_type(schema.items)}]"
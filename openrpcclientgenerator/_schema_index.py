@@ -0,0 +1,254 @@
+"""Index of named schemas with every `$ref` resolved."""
+from __future__ import annotations
+
+import json
+import urllib.parse
+from pathlib import Path
+from typing import Any, Iterator
+
+import caseswitcher
+from openrpc import OpenRPC, Schema, SchemaType
+from pydantic import BaseModel
+
+# Location of a schema, file path or `None` for the OpenRPC document
+# and a JSON pointer.
+Location = tuple[Path | None, str]
+
+
+class SchemaIndex:
+    """Named schemas of an OpenRPC document and the files it references.
+
+    Every `$ref` is resolved once, local JSON pointers against the
+    document and file-relative refs against files loaded from disk.
+    Referenced and component schemas that are generated as models, enums
+    or classes with properties, are given unique names and ordered so
+    models come after the models they use.
+
+    :param rpc: OpenRPC document.
+    :param base_path: Directory file-relative refs of the document are
+        resolved against, defaults to the working directory.
+    """
+
+    def __init__(self, rpc: OpenRPC, base_path: Path | None = None) -> None:
+        self.base_path = base_path or Path.cwd()
+        # Loaded files by path.
+        self.files: dict[Path, Any] = {}
+        # Models ordered so dependencies come first.
+        self.models: dict[str, SchemaType] = {}
+        # Names of models that are part of reference cycles.
+        self.cyclic: set[str] = set()
+        # Names of models used by each model.
+        self.dependencies: dict[str, list[str]] = {}
+        self._rpc = rpc
+        self._schemas: dict[Location, SchemaType] = {}
+        self._names: dict[Location, str] = {}
+        # Names given to models, to keep new names unique.
+        self._taken_names: set[str] = set()
+        # Resolved target location of each schema with a `$ref`. Schemas
+        # are kept so their ids stay valid.
+        self._refs: dict[int, tuple[Schema, Location | None]] = {}
+        self._unresolved: list[tuple[SchemaType, Path | None]] = []
+
+        components = (rpc.components.schemas if rpc.components else None) or {}
+        named: dict[str, SchemaType] = {}
+        for name, schema in components.items():
+            location: Location = (None, f"/components/schemas/{_escape(name)}")
+            self._schemas[location] = schema
+            if is_model(schema):
+                self._names[location] = name
+                self._taken_names.add(name)
+                named[name] = schema
+            self._unresolved.append((schema, None))
+        for method in rpc.methods:
+            for param in method.params:
+                self._unresolved.append((param.schema_, None))
+            self._unresolved.append((method.result.schema_, None))
+        while self._unresolved:
+            self._index(*self._unresolved.pop())
+        for location, name in self._names.items():
+            named.setdefault(name, self._schemas[location])
+        self._order(named)
+
+    def resolve(self, schema: Schema) -> tuple[str | None, SchemaType | None]:
+        """Get the model name and the schema a `$ref` schema refers to.
+
+        :param schema: Schema with a `$ref`.
+        :return: Name of the referenced model, `None` if it is not a
+            model, and the referenced schema, `None` if the ref could
+            not be resolved.
+        """
+        if (ref := self._refs.get(id(schema))) is None or ref[1] is None:
+            return None, None
+        location = ref[1]
+        return self._names.get(location), self._schemas[location]
+
+    def _index(self, root: SchemaType, file: Path | None) -> None:
+        for schema in _iter_schemas(root):
+            if schema.ref is None or id(schema) in self._refs:
+                continue
+            location = self._locate(schema.ref, file)
+            self._refs[id(schema)] = (schema, location)
+
+    def _locate(self, ref: str, file: Path | None) -> Location | None:
+        url, fragment = urllib.parse.urldefrag(ref)
+        if urllib.parse.urlparse(url).scheme:
+            return None
+        if url:
+            directory = file.parent if file else self.base_path
+            file = directory.joinpath(urllib.parse.unquote(url)).resolve()
+        pointer = urllib.parse.unquote(fragment)
+        location = (file, pointer)
+        if location in self._schemas:
+            return location
+        try:
+            schema = self._get_schema(file, pointer)
+        except (OSError, ValueError, LookupError):
+            return None
+        self._schemas[location] = schema
+        if is_model(schema) and location not in self._names:
+            name = self._get_unique_name(file, pointer)
+            self._names[location] = name
+            self._taken_names.add(name)
+        if file is not None:
+            self._unresolved.append((schema, file))
+        return location
+
+    def _get_schema(self, file: Path | None, pointer: str) -> SchemaType:
+        node: Any = self._rpc if file is None else self._load(file)
+        for token in pointer.split("/")[1:]:
+            node = _get_child(node, _unescape(token))
+        if isinstance(node, (Schema, bool)):
+            return node
+        return Schema(**node)
+
+    def _load(self, file: Path) -> Any:
+        if file not in self.files:
+            self.files[file] = json.loads(file.read_text())
+        return self.files[file]
+
+    def _get_unique_name(self, file: Path | None, pointer: str) -> str:
+        if pointer.strip("/"):
+            name = _unescape(pointer.rsplit("/", 1)[-1])
+        else:
+            name = caseswitcher.to_pascal(file.stem if file else "Model")
+        unique_name, i = name, 1
+        while unique_name in self._taken_names:
+            i += 1
+            unique_name = f"{name}{i}"
+        return unique_name
+
+    def _order(self, named: dict[str, SchemaType]) -> None:
+        """Order models topologically and find reference cycles."""
+        graph = {name: self.get_dependencies(schema) for name, schema in named.items()}
+        self.dependencies = graph
+        for component in get_components(graph):
+            if len(component) > 1 or component[0] in graph[component[0]]:
+                self.cyclic.update(component)
+            for member in component:
+                self.models[member] = named[member]
+
+    def get_dependencies(self, model: SchemaType) -> list[str]:
+        """Get names of models used by a schema, following inlined refs."""
+        dependencies: dict[str, None] = {}
+        visited: set[int] = set()
+        roots: list[SchemaType] = [model]
+        while roots:
+            for schema in _iter_schemas(roots.pop()):
+                if schema.ref is None or id(schema) in visited:
+                    continue
+                visited.add(id(schema))
+                name, target = self.resolve(schema)
+                if name is not None:
+                    dependencies[name] = None
+                elif target is not None:
+                    roots.append(target)
+        return list(dependencies)
+
+
+def get_components(graph: dict[str, list[str]]) -> Iterator[list[str]]:
+    """Get strongly connected components of a graph.
+
+    Uses Tarjan's strongly connected components algorithm, which yields
+    components after the components they refer to. Members of a
+    component are in the order they were found.
+
+    :param graph: Nodes each node refers to.
+    :return: Components, each a list of nodes referring to each other.
+    """
+    indexes: dict[str, int] = {}
+    low_links: dict[str, int] = {}
+    stack: list[str] = []
+    on_stack: set[str] = set()
+    for root in graph:
+        if root in indexes:
+            continue
+        work = [(root, iter(graph[root]))]
+        indexes[root] = low_links[root] = len(indexes)
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            name, dependencies = work[-1]
+            for dependency in dependencies:
+                if dependency not in indexes:
+                    indexes[dependency] = low_links[dependency] = len(indexes)
+                    stack.append(dependency)
+                    on_stack.add(dependency)
+                    work.append((dependency, iter(graph[dependency])))
+                    break
+                if dependency in on_stack:
+                    low_links[name] = min(low_links[name], indexes[dependency])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low_links[parent] = min(low_links[parent], low_links[name])
+                if low_links[name] == indexes[name]:
+                    component = []
+                    while (member := stack.pop()) != name:
+                        component.append(member)
+                    component.append(name)
+                    on_stack.difference_update(component)
+                    yield sorted(component, key=indexes.__getitem__)
+
+
+def is_model(schema: SchemaType) -> bool:
+    """Check if a schema is generated as a model."""
+    return isinstance(schema, Schema) and bool(schema.enum or schema.properties)
+
+
+def _iter_schemas(root: SchemaType) -> Iterator[Schema]:
+    """Iterate a schema and its subschemas without following refs."""
+    stack = [root]
+    while stack:
+        schema = stack.pop()
+        if not isinstance(schema, Schema):
+            continue
+        yield schema
+        for name in schema.model_fields_set:
+            value = getattr(schema, name)
+            if isinstance(value, Schema):
+                stack.append(value)
+            elif isinstance(value, list):
+                stack.extend(it for it in value if isinstance(it, Schema))
+            elif isinstance(value, dict):
+                stack.extend(it for it in value.values() if isinstance(it, Schema))
+
+
+def _get_child(node: Any, token: str) -> Any:
+    if isinstance(node, dict):
+        return node[token]
+    if isinstance(node, list):
+        return node[int(token)]
+    if isinstance(node, BaseModel):
+        for name, field in type(node).model_fields.items():
+            if token in (name, field.alias):
+                return getattr(node, name)
+    raise LookupError(token)
+
+
+def _escape(token: str) -> str:
+    return token.replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
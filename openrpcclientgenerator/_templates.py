@@ -0,0 +1,61 @@
+"""Jinja environment of precompiled templates."""
+from __future__ import annotations
+
+import functools
+import shutil
+import uuid
+from pathlib import Path
+
+import jinja2
+from jinja2 import BaseLoader, Environment, FileSystemLoader, ModuleLoader
+
+from openrpcclientgenerator import _common as common
+from openrpcclientgenerator._manifest import get_templates_digest, templates
+
+
+@functools.cache
+def get_env() -> Environment:
+    """Get the environment of all templates.
+
+    Templates are compiled to Python modules once per Jinja version and
+    templates digest and kept in the cache directory, so later processes
+    import them instead of parsing templates again. Templates are loaded
+    from source if the cache directory is not writable.
+    """
+    name = f"{jinja2.__version__}-{get_templates_digest()[:16]}"
+    bundle = common.get_cache_dir().joinpath("templates", name)
+    try:
+        if not bundle.is_dir():
+            _compile(bundle)
+    except OSError:
+        return _new_env(FileSystemLoader(templates))
+    return _new_env(ModuleLoader(bundle))
+
+
+def get_template_names() -> list[str]:
+    """Get names of all templates."""
+    return sorted(
+        it.relative_to(templates).as_posix() for it in templates.rglob("*.j2")
+    )
+
+
+def _compile(bundle: Path) -> None:
+    env = _new_env(FileSystemLoader(templates))
+    bundle.parent.mkdir(parents=True, exist_ok=True)
+    temp_dir = bundle.with_name(f".{bundle.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        env.compile_templates(temp_dir, zip=None, ignore_errors=False)
+        temp_dir.rename(bundle)
+    except OSError:
+        # Another process may have compiled the bundle first.
+        if not bundle.is_dir():
+            raise
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def _new_env(loader: BaseLoader) -> Environment:
+    # Templates render code, not HTML, so nothing is autoescaped.
+    return Environment(  # noqa: S701
+        loader=loader, lstrip_blocks=True, trim_blocks=True
+    )
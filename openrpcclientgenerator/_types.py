@@ -0,0 +1,194 @@
+"""Language-neutral types resolved from JSON Schemas."""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, ClassVar, Iterable, TYPE_CHECKING
+
+from openrpc import Method, Schema, SchemaType
+
+if TYPE_CHECKING:
+    from openrpcclientgenerator._schema_index import SchemaIndex
+
+
+@dataclass(frozen=True, slots=True)
+class AnyType:
+    """Any value."""
+
+
+@dataclass(frozen=True, slots=True)
+class PrimitiveType:
+    """A JSON Schema primitive type, strings may have a format."""
+
+    name: str
+    format: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class ConstType:
+    """A single constant value."""
+
+    value: Any
+
+
+@dataclass(frozen=True, slots=True)
+class ArrayType:
+    """An array of items, unique items make it a set."""
+
+    items: TypeNode
+    unique: bool = False
+
+
+@dataclass(frozen=True, slots=True)
+class TupleType:
+    """An array with a type for each position."""
+
+    items: tuple[TypeNode, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class MapType:
+    """An object with string keys."""
+
+    values: TypeNode
+
+
+@dataclass(frozen=True, slots=True)
+class RefType:
+    """A named schema."""
+
+    name: str
+
+
+@dataclass(frozen=True, slots=True)
+class UnionType:
+    """One of several types."""
+
+    members: tuple[TypeNode, ...]
+
+
+TypeNode = (
+    AnyType
+    | PrimitiveType
+    | ConstType
+    | ArrayType
+    | TupleType
+    | MapType
+    | RefType
+    | UnionType
+)
+any_type = AnyType()
+
+
+class TypeResolver:
+    """Resolve schemas to types, memoized by schema identity.
+
+    Resolved schemas are referenced by the resolver so their ids stay
+    valid for as long as the resolver is used. Without a schema index,
+    refs are named after the last segment of their JSON pointer.
+
+    :param index: Index resolving `$ref`s of the schemas.
+    """
+
+    def __init__(self, index: SchemaIndex | None = None) -> None:
+        self.index = index
+        self._types: dict[int, tuple[SchemaType | None, TypeNode]] = {}
+        self._refs: dict[str, RefType] = {}
+        # Ids of schemas being resolved, to detect cyclic inlined refs.
+        self._resolving: set[int] = set()
+
+    def resolve_all(
+        self, schemas: dict[str, SchemaType], methods: Iterable[Method]
+    ) -> None:
+        """Resolve component schemas and method params and results."""
+        for schema in schemas.values():
+            self.resolve(schema)
+            if not isinstance(schema, bool):
+                for prop in (schema.properties or {}).values():
+                    self.resolve(prop)
+        for method in methods:
+            for param in method.params:
+                self.resolve(param.schema_)
+            self.resolve(method.result.schema_)
+
+    def resolve(self, schema: SchemaType | None) -> TypeNode:
+        """Get the type of a schema."""
+        if (resolved := self._types.get(id(schema))) is not None:
+            return resolved[1]
+        node = self._resolve(schema)
+        self._types[id(schema)] = (schema, node)
+        return node
+
+    def _resolve(self, schema: SchemaType | None) -> TypeNode:
+        if schema is None or isinstance(schema, bool):
+            return any_type
+        if "const" in schema.model_fields_set:
+            return ConstType(schema.const)
+        if schema.type:
+            return self._resolve_type(schema, schema.type)
+        if schema_list := schema.all_of or schema.any_of or schema.one_of:
+            return UnionType(tuple(self.resolve(it) for it in schema_list))
+        if schema.ref:
+            return self._resolve_ref(schema)
+        return any_type
+
+    def _resolve_type(self, schema: Schema, type_name: str | list[str]) -> TypeNode:
+        if type_name == "array":
+            if "prefix_items" in schema.model_fields_set:
+                items = tuple(self.resolve(it) for it in schema.prefix_items or [])
+                return TupleType(items)
+            return ArrayType(self.resolve(schema.items), bool(schema.unique_items))
+        if type_name == "object":
+            return MapType(self.resolve(schema.additional_properties))
+        if isinstance(type_name, list):
+            return UnionType(tuple(PrimitiveType(it) for it in type_name))
+        if type_name == "string":
+            return PrimitiveType(type_name, schema.format)
+        return PrimitiveType(type_name)
+
+    def _resolve_ref(self, schema: Schema) -> TypeNode:
+        name, target = self.index.resolve(schema) if self.index else (None, None)
+        if name is None and target is not None:
+            # Schemas not generated as models are inlined.
+            if id(target) in self._resolving:
+                return any_type
+            self._resolving.add(id(target))
+            try:
+                return self.resolve(target)
+            finally:
+                self._resolving.discard(id(target))
+        name = name or re.sub(r"#/.*/(.*)", r"\1", schema.ref or "")
+        if (node := self._refs.get(name)) is None:
+            node = RefType(name)
+            self._refs[name] = node
+        return node
+
+
+class TypeFormatter:
+    """Format schemas as type names of a language.
+
+    Type names are memoized by schema and by type identity so shared
+    and nested schemas are only formatted once. Subclasses format each
+    kind of type with a function of `_formatters`.
+    """
+
+    # Functions formatting a type by its class.
+    _formatters: ClassVar[dict[type, Callable[[Any, Any], str]]] = {}
+
+    def __init__(self, resolver: TypeResolver | None = None) -> None:
+        self.resolver = resolver or TypeResolver()
+        self._names: dict[int, str] = {}
+
+    def __call__(self, schema: SchemaType | None) -> str:
+        """Get the type name of a schema."""
+        return self.format(self.resolver.resolve(schema))
+
+    def format(self, node: TypeNode) -> str:
+        """Get the type name of a type."""
+        if (name := self._names.get(id(node))) is None:
+            name = self._format(node)
+            self._names[id(node)] = name
+        return name
+
+    def _format(self, node: TypeNode) -> str:
+        return self._formatters[type(node)](self, node)
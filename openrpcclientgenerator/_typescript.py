@@ -1,21 +1,33 @@
 """Generate TypeScript client."""
 from __future__ import annotations
 
-import re
+import json
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
 
 import caseswitcher
-from jinja2 import Environment, FileSystemLoader
-from openrpc import Info, Method, OpenRPC, Schema, SchemaType
+from openrpc import Info, Method, OpenRPC, SchemaType
 
 from openrpcclientgenerator import _common as common
-
-root = Path(__file__).parent
-templates = root.joinpath("templates")
-env = Environment(  # noqa: S701
-    loader=FileSystemLoader(templates), lstrip_blocks=True, trim_blocks=True
+from openrpcclientgenerator import _mock
+from openrpcclientgenerator._options import GenerateOptions
+from openrpcclientgenerator._profiling import phase
+from openrpcclientgenerator._schema_index import SchemaIndex
+from openrpcclientgenerator._templates import get_env
+from openrpcclientgenerator._types import (
+    AnyType,
+    ArrayType,
+    ConstType,
+    MapType,
+    PrimitiveType,
+    RefType,
+    TupleType,
+    TypeFormatter,
+    TypeResolver,
+    UnionType,
 )
+
+out_dir_name = common.out_dir_names[common.Language.TYPESCRIPT]
 ts_config = """
 {
   "compilerOptions": {
@@ -33,72 +45,210 @@ ts_config = """
   "exclude": ["node_modules", "lib"]
 }
 """
+# Words functions of methods can't be named.
+reserved_words = frozenset(
+    """
+    break case catch class const continue debugger default delete do else enum
+    export extends false finally for function if import in instanceof new null
+    return super switch this throw true try typeof var void while with as
+    implements interface let package private protected public static yield
+    await
+    """.split()
+)
 
 
-def generate_client(rpc: OpenRPC, url: str, transport: str, out: Path) -> str:
-    """Generate a TypeScript client."""
+def generate_client(
+    rpc: OpenRPC,
+    url: str,
+    out: Path,
+    options: GenerateOptions | None = None,
+    index: SchemaIndex | None = None,
+) -> str:
+    """Generate a TypeScript client.
+
+    Client and models modules are streamed to their files if
+    `options.streaming` instead of rendered as whole modules. Results
+    of methods matching a pattern in `options.cache` are cached. Clients
+    of the `functions` style also get a transport module and a module of
+    a function per method. A mock server and a benchmark of the client
+    against it are generated if `options.mock`.
+    """
+    options = options or GenerateOptions()
+    transport = common.get_transport(url)
+    style = options.ts_style
     out.mkdir(exist_ok=True)
-    ts_out = out.joinpath("typescript")
+    ts_out = out.joinpath(out_dir_name)
     ts_out.mkdir(exist_ok=True)
-    client_name = caseswitcher.to_kebab(f"{rpc.info.title}-{transport.lower()}-client")
+    client_name = common.get_client_name(rpc.info.title, transport)
     client_dir = ts_out.joinpath(client_name)
     client_dir.mkdir(exist_ok=True)
     src_dir = client_dir.joinpath(caseswitcher.to_snake("src"))
     src_dir.mkdir(exist_ok=True)
 
     # Create TypeScript files.
-    schemas = (rpc.components.schemas if rpc.components is not None else {}) or {}
-    client = _get_client(rpc.info.title, rpc.methods, schemas, url, transport)
-    common.touch_and_write(src_dir.joinpath("client.ts"), client)
-    common.touch_and_write(src_dir.joinpath("models.ts"), _get_models(schemas))
-    common.touch_and_write(
-        src_dir.joinpath("index.ts"), _get_index(rpc.info.title, schemas)
-    )
+    writer = options.writer or common.FileWriter()
+    if index is None:
+        with phase("index"):
+            index = SchemaIndex(rpc, options.base_path)
+    schemas = index.models
+    types = TypeScriptTypes(TypeResolver(index))
+    with phase("types"):
+        types.resolver.resolve_all(schemas, rpc.methods)
+    with phase("group"):
+        group = common.get_rpc_group(
+            caseswitcher.to_pascal(rpc.info.title), rpc.methods
+        )
+    client_path = src_dir.joinpath("client.ts")
+    models_path = src_dir.joinpath("models.ts")
+    context = _get_client_context(group, schemas, url, types, options)
+    if options.streaming:
+        writer.write_stream(
+            client_path, _stream("typescript/client_module.j2", context)
+        )
+        models_context = _get_models_context(schemas, types)
+        writer.write_stream(
+            models_path, _stream("typescript/models.j2", models_context)
+        )
+    else:
+        writer.write(client_path, _render("typescript/client_module.j2", context))
+        writer.write(models_path, _get_models(schemas, types))
+    if style is common.TypeScriptStyle.FUNCTIONS:
+        writer.write(
+            src_dir.joinpath("transport.ts"),
+            _render("typescript/transport_module.j2", context),
+        )
+        taken = {*schemas, *map(caseswitcher.to_pascal, schemas)}
+        taken.update(("Transport", f"{group.name}Client"))
+        methods = _get_methods(rpc.methods, schemas, types, taken)
+        writer.write(src_dir.joinpath("methods.ts"), methods)
+    index_ts = _get_index(rpc.info.title, schemas, style)
+    writer.write(src_dir.joinpath("index.ts"), index_ts)
 
     # Create project files.
-    common.touch_and_write(
-        client_dir.joinpath("package.json"), _get_package_json(rpc.info, transport)
+    writer.write(
+        client_dir.joinpath("package.json"),
+        _get_package_json(rpc.info, transport, style),
     )
-    common.touch_and_write(client_dir.joinpath("tsconfig.json"), ts_config)
+    writer.write(client_dir.joinpath("tsconfig.json"), ts_config)
 
-    common.touch_and_write(
+    writer.write(
         client_dir.joinpath("README.md"), _get_readme(rpc.info.title, transport)
     )
+    if options.mock:
+        _mock.write_mock_server(rpc, index, url, client_dir, writer)
+        writer.write(
+            client_dir.joinpath("benchmark.ts"),
+            _get_benchmark(rpc.info.title, group, url, transport, style),
+        )
     return client_name
 
 
 def _get_client(
-    title: str,
-    methods: list[Method],
+    group: common.RPCGroup,
     schemas: dict[str, SchemaType],
     url: str,
-    transport: str,
+    types: TypeScriptTypes,
+    options: GenerateOptions | None = None,
 ) -> str:
-    group = common.get_rpc_group(caseswitcher.to_pascal(title), methods)
-    context = {
+    context = _get_client_context(
+        group, schemas, url, types, options or GenerateOptions()
+    )
+    return _render("typescript/client_module.j2", context)
+
+
+def _get_client_context(
+    group: common.RPCGroup,
+    schemas: dict[str, SchemaType],
+    url: str,
+    types: TypeScriptTypes,
+    options: GenerateOptions,
+) -> dict[str, Any]:
+    transport = common.get_transport(url)
+    # Methods of clients the decorator leaves as is, unless the document
+    # has a method of the same name.
+    client_methods = ["batch", "connect", "close"] if transport == "WS" else ["batch"]
+    skip_methods = [it for it in client_methods if it not in group.methods]
+    cached = {
+        method.name: method_cache
+        for _, method in group.iter_methods()
+        if (method_cache := common.get_cache(options.cache, method.name))
+    }
+    return {
         "imports": "{%s}" % ", ".join(schemas),
         "transport": transport,
+        "style": options.ts_style.value,
         "group": group,
-        "ts_type": ts_type,
+        "ts_type": types,
         "cs": caseswitcher,
         "url": url,
-        "skip_methods": '"connect", "close"' if transport == "WS" else "",
+        "skip_methods": ", ".join(f'"{it}"' for it in skip_methods),
+        # Seconds results are cached for and results cached by method.
+        "cache_policies": {
+            json.dumps(name): [json.dumps(it.ttl), it.max_entries]
+            for name, it in cached.items()
+        },
     }
-    return env.get_template("typescript/client_module.j2").render(context)
 
 
-def _get_models(schemas: dict[str, SchemaType]) -> str:
+def _get_methods(
+    methods: list[Method],
+    schemas: dict[str, SchemaType],
+    types: TypeScriptTypes,
+    taken: set[str],
+) -> str:
     context = {
+        "methods": methods,
+        "functions": _get_function_names(methods, taken),
+        "imports": "{%s}" % ", ".join(schemas),
+        "ts_type": types,
+        "cs": caseswitcher,
+    }
+    return _render("typescript/methods.j2", context)
+
+
+def _get_function_names(methods: list[Method], taken: set[str]) -> dict[str, str]:
+    """Get unique names of functions of methods by method name.
+
+    Names are method names in camel case, e.g. `mathGetVector` for
+    `math.get_vector`. Names that are reserved words or already taken
+    get a number appended.
+    """
+    names: dict[str, str] = {}
+    taken = set(taken)
+    for method in methods:
+        name = base = caseswitcher.to_camel(method.name) or "method"
+        if base[0].isdigit():
+            name = base = f"method{base}"
+        number = 1
+        while name in taken or name in reserved_words:
+            number += 1
+            name = f"{base}{number}"
+        taken.add(name)
+        names[method.name] = name
+    return names
+
+
+def _get_models(schemas: dict[str, SchemaType], types: TypeScriptTypes) -> str:
+    return _render("typescript/models.j2", _get_models_context(schemas, types))
+
+
+def _get_models_context(
+    schemas: dict[str, SchemaType], types: TypeScriptTypes
+) -> dict[str, Any]:
+    return {
         "schemas": schemas,
-        "ts_type": ts_type,
+        "ts_type": types,
         "cs": caseswitcher,
         "get_enum_option_name": common.get_enum_option_name,
         "get_enum_value": common.get_enum_value,
     }
-    return env.get_template("typescript/models.j2").render(context)
 
 
-def _get_index(title: str, schemas: dict[str, SchemaType]) -> str:
+def _get_index(
+    title: str,
+    schemas: dict[str, SchemaType],
+    style: common.TypeScriptStyle = common.TypeScriptStyle.DECORATED,
+) -> str:
     models = ", ".join(schemas)
     client = f"{caseswitcher.to_pascal(title)}Client"
     context = {
@@ -106,22 +256,27 @@ def _get_index(title: str, schemas: dict[str, SchemaType]) -> str:
         "model_imports": f"{{{models}}}",
         "client_import": f"{{{client}}}",
         "exports": f"{client}, {models}",
+        "style": style.value,
     }
-    return env.get_template("typescript/index.j2").render(context)
+    return _render("typescript/index.j2", context)
 
 
-def _get_package_json(info: Info, transport: str) -> str:
+def _get_package_json(
+    info: Info,
+    transport: str,
+    style: common.TypeScriptStyle = common.TypeScriptStyle.DECORATED,
+) -> str:
     context = {
         "project_name": caseswitcher.to_kebab(info.title) + "-client",
         "project_title": caseswitcher.to_title(info.title),
         "info": info,
         "transport": transport,
+        "style": style.value,
     }
-    return env.get_template("typescript/package_json.j2").render(context) + "\n"
+    return _render("typescript/package_json.j2", context) + "\n"
 
 
 def _get_readme(rpc_title: str, transport: str) -> str:
-    template = env.get_template("python/readme.j2")
     context = {
         "project_title": caseswitcher.to_title(rpc_title),
         "client_import": "{%sClient}" % caseswitcher.to_pascal(rpc_title),
@@ -129,23 +284,96 @@ def _get_readme(rpc_title: str, transport: str) -> str:
         "client_name": caseswitcher.to_pascal(rpc_title) + "Client",
         "transport": transport,
     }
-    return template.render(context) + "\n"
+    return _render("python/readme.j2", context) + "\n"
 
 
-def ts_type(schema: SchemaType | None) -> str:
-    """Get TypeScript type from JSON Schema type."""
-    if schema is None or isinstance(schema, bool):
+def _get_benchmark(
+    rpc_title: str,
+    group: common.RPCGroup,
+    url: str,
+    transport: str,
+    style: common.TypeScriptStyle,
+) -> str:
+    paths = {
+        method.name: [
+            *map(caseswitcher.to_camel, path[:-1]),
+            caseswitcher.to_camel(path[-1]) or "method",
+        ]
+        for path, method in group.iter_methods()
+    }
+    context = {
+        "title": caseswitcher.to_title(rpc_title),
+        "client_name": f"{caseswitcher.to_pascal(group.name)}Client",
+        "url": url,
+        "transport": transport,
+        "style": style.value,
+        "paths": paths,
+        "first_method": next(iter(paths), ""),
+    }
+    return _render("typescript/benchmark.j2", context)
+
+
+def _render(name: str, context: dict[str, Any]) -> str:
+    with phase(f"render:{name}"):
+        return get_env().get_template(name).render(context)
+
+
+def _stream(name: str, context: dict[str, Any]) -> Iterator[str]:
+    with phase(f"render:{name}"):
+        template = get_env().get_template(name)
+    return template.generate(context)
+
+
+class TypeScriptTypes(TypeFormatter):
+    """Format schemas as TypeScript types."""
+
+    def _format_any(self, _node: AnyType) -> str:
         return "any"
-    if "const" in schema.model_fields_set:
-        return _get_const_type(schema.const)
-    if schema.type:
-        return _get_schema_from_type(schema)
-    if schema_list := schema.all_of or schema.any_of or schema.one_of:
-        return " | ".join(ts_type(it) for it in schema_list)
-    if schema.ref:
-        return re.sub(r"#/.*/(.*)", r"\1", schema.ref)
 
-    return "any"
+    def _format_const(self, node: ConstType) -> str:
+        return _get_const_type(node.value)
+
+    def _format_primitive(self, node: PrimitiveType) -> str:
+        return "number" if node.name == "integer" else node.name
+
+    def _format_array(self, node: ArrayType) -> str:
+        array_type = self.format(node.items)
+        if node.unique:
+            return f"Set<{array_type}>"
+        if "|" in array_type:
+            return f"Array<{array_type}>"
+        return f"{array_type}[]"
+
+    def _format_tuple(self, node: TupleType) -> str:
+        return f"[{', '.join(self.format(it) for it in node.items)}]"
+
+    def _format_map(self, node: MapType) -> str:
+        v_type = self.format(node.values)
+        if v_type != "any":
+            return f"Record<string, {v_type}>"
+        return "object"
+
+    def _format_union(self, node: UnionType) -> str:
+        return " | ".join(self.format(it) for it in node.members)
+
+    def _format_ref(self, node: RefType) -> str:
+        return node.name
+
+    _formatters = {
+        AnyType: _format_any,
+        ConstType: _format_const,
+        PrimitiveType: _format_primitive,
+        ArrayType: _format_array,
+        TupleType: _format_tuple,
+        MapType: _format_map,
+        UnionType: _format_union,
+        RefType: _format_ref,
+    }
+
+
+def ts_type(schema: SchemaType | None) -> str:
+    """Get TypeScript type from JSON Schema type."""
+    return TypeScriptTypes()(schema)
 
 
 def _get_const_type(const_value: Any) -> str:
@@ -159,34 +387,3 @@ def _get_const_type(const_value: Any) -> str:
     if const_value is None:
         return "null"
     return "any"
-
-
-def _get_schema_from_type(schema: Schema) -> str:
-    if schema.type == "array":
-        return _get_array_type(schema)
-    if schema.type == "object":
-        return _get_object_type(schema)
-    if isinstance(schema.type, list):
-        return " | ".join(it if it != "integer" else "number" for it in schema.type)
-    return schema.type or "any" if schema.type != "integer" else "number"
-
-
-def _get_array_type(schema: Schema) -> str:
-    if "prefix_items" in schema.model_fields_set:
-        types = ", ".join(
-            ts_type(prefix_item) for prefix_item in schema.prefix_items or []
-        )
-        return f"[{types}]"
-    if schema.unique_items:
-        return f"Set<{ts_type(schema.items)}>"
-    array_type = ts_type(schema.items)
-    if "|" in array_type:
-        return f"Array<{ts_type(schema.items)}>"
-    return f"{ts_type(schema.items)}[]"
-
-
-def _get_object_type(schema: Schema) -> str:
-    v_type = ts_type(schema.additional_properties)
-    if v_type != "any":
-        return f"Record<string, {v_type}>"
-    return "object"
@@ -0,0 +1,35 @@
+"""Test the generation benchmarks run."""
+from benchmarks import bundle, generate, load, models
+from openrpcclientgenerator import Language
+
+
+def test_run() -> None:
+    for language in Language:
+        result = generate.run("methods-10", language, 1)
+        assert result["methods"] == 10
+        phases = {"parse", "types", "group", "render", "io"}
+        if language is Language.PYTHON:
+            phases.add("format")
+        assert set(result["phases"]) == phases
+        assert not generate.get_regressions([result], [result], 0.0)
+
+
+def test_models() -> None:
+    result = models.run(10, 1)
+    assert result["objects"] == 10
+    assert set(result["backends"]) == {"pydantic", "pydantic-orjson", "msgspec"}
+
+
+def test_bundle() -> None:
+    result = bundle.run("methods-10", [1, 10])
+    assert result["methods"] == 10
+    decorated = result["styles"]["decorated"]["reachable_bytes"]
+    functions = result["styles"]["functions"]["reachable_bytes"]
+    assert decorated["1"] == decorated["10"]
+    assert functions["1"] < functions["10"]
+    assert functions["1"] < decorated["1"]
+
+
+def test_load() -> None:
+    result = load.run("methods-10", 1)
+    assert set(result["loaders"]) == {"baseline", "load_openrpc", "trusted", "pickle"}
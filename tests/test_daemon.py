@@ -0,0 +1,102 @@
+"""Test the generator daemon."""
+import asyncio
+import json
+import sys
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from openrpcclientgenerator import Formatting, GenerateOptions
+
+# noinspection PyProtectedMember
+from openrpcclientgenerator._daemon import (
+    _is_listening,
+    Daemon,
+    InotifyWatcher,
+    PollingWatcher,
+    send,
+)
+from test_generate import spec, url
+
+
+def test_daemon(tmp_path: Path) -> None:
+    spec_path = tmp_path.joinpath("spec.json")
+    spec_path.write_text(json.dumps(spec))
+    socket_path = tmp_path.joinpath("daemon.sock")
+    # Left behind by a daemon that didn't stop cleanly.
+    socket_path.write_text("")
+    options = GenerateOptions(formatting=Formatting.NONE, sync=True)
+    target = {
+        "openrpc": str(spec_path),
+        "url": url,
+        "languages": ["py"],
+        "out": str(tmp_path.joinpath("out")),
+        "options": options.model_dump(mode="json"),
+    }
+
+    async def _request(request: dict[str, Any]) -> dict[str, Any]:
+        return await asyncio.to_thread(send, request, socket_path)
+
+    async def _run() -> None:
+        daemon = Daemon(socket_path, debounce=0.01, watcher=PollingWatcher(0.01))
+        serving = asyncio.create_task(daemon.serve())
+        while not await asyncio.to_thread(_is_listening, socket_path):
+            await asyncio.sleep(0.01)
+        with pytest.raises(RuntimeError, match="already listening"):
+            await Daemon(socket_path, watcher=PollingWatcher()).serve()
+
+        first = await _request({"command": "watch", "target": target})
+        assert first["error"] is None
+        assert first["client_names"] == ["test-api-http-client"]
+        assert set(first["files"].values()) == {"created"}
+        assert any(it.endswith("sync_client.py") for it in first["files"])
+        again = await _request({"command": "generate", "target": target})
+        assert set(again["files"].values()) == {"unchanged"}
+        status = await _request({"command": "status"})
+        assert [it["openrpc"] for it in status["targets"]] == [str(spec_path)]
+
+        # Watched documents are generated again when they change.
+        document = json.loads(json.dumps(spec))
+        document["methods"][0]["name"] = "subtract"
+        spec_path.write_text(json.dumps(document))
+        client_path = next(tmp_path.joinpath("out").rglob("client.py"))
+        for _ in range(500):
+            if "def subtract(" in client_path.read_text():
+                break
+            await asyncio.sleep(0.01)
+        assert "def subtract(" in client_path.read_text()
+
+        invalid = await _request({"command": "generate", "target": {"url": url}})
+        assert invalid["error"].startswith("Invalid request")
+        unknown = await _request({"command": "build"})
+        assert unknown["error"] == "Unknown command `build`."
+        assert await _request({"command": "stop"}) == {"stopped": True}
+        await serving
+
+    asyncio.run(_run())
+    assert not socket_path.exists()
+    with pytest.raises(ConnectionError):
+        send({"command": "status"}, socket_path)
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Linux only.")
+def test_inotify_watcher(tmp_path: Path) -> None:
+    watched = tmp_path.joinpath("spec.json")
+    watched.write_text("{}")
+
+    async def _run() -> set[Path]:
+        watcher = InotifyWatcher()
+        watcher.watch({watched})
+        try:
+            waiting = asyncio.create_task(watcher.wait())
+            await asyncio.sleep(0.01)
+            tmp_path.joinpath("other.json").write_text("{}")
+            # Saved by moving a new copy over the file.
+            tmp_path.joinpath("spec.json.tmp").write_text("[]")
+            tmp_path.joinpath("spec.json.tmp").rename(watched)
+            return await asyncio.wait_for(waiting, 5)
+        finally:
+            watcher.close()
+
+    assert asyncio.run(_run()) == {watched}
@@ -0,0 +1,93 @@
+"""Test formatting generated Python code."""
+import collections
+import itertools
+from pathlib import Path
+
+import black
+import pytest
+from openrpc import OpenRPC
+
+from openrpcclientgenerator import (
+    Cache,
+    Codec,
+    generate,
+    GenerateOptions,
+    Language,
+    ModelBackend,
+    ModelLayout,
+)
+
+# noinspection PyProtectedMember
+from openrpcclientgenerator import _formatting
+from openrpcclientgenerator._formatting import (
+    format_python,
+    format_python_stream,
+    Formatting,
+)
+from test_generate import spec, url
+
+source = """import a
+x = (
+1,
+2)
+# Comment.
+@decorator
+def f(  a,b ):
+    if a:
+        return b
+    s = '''
+not a statement
+'''
+try:
+  pass
+except Exception:
+  pass
+class A:
+
+    y: int=1
+    def g(self): ...
+"""
+
+
+def test_format_stream() -> None:
+    expected = format_python(source, Formatting.BLACK)
+    for size in (1, 7, len(source)):
+        chunks = [source[i : i + size] for i in range(0, len(source), size)]
+        assert "".join(format_python_stream(chunks, Formatting.BLACK)) == expected
+    assert "".join(format_python_stream([source], Formatting.NONE)) == source
+
+
+def test_unformatted_output_is_black_stable(tmp_path: Path) -> None:
+    rpc = OpenRPC(**spec)
+    combinations = itertools.product(
+        ModelBackend, Codec, ModelLayout, ({}, {"*": Cache(ttl=1)})
+    )
+    for i, (models, codec, layout, cache) in enumerate(combinations):
+        options = GenerateOptions(
+            formatting=Formatting.NONE,
+            sync=True,
+            models=models,
+            codec=codec,
+            model_layout=layout,
+            cache=cache,
+            mock=True,
+        )
+        out = tmp_path.joinpath(str(i))
+        generate(rpc, Language.PYTHON, url, out, options)
+        ws_options = options.model_copy(update={"sync": False})
+        generate(rpc, Language.PYTHON, "ws://localhost", out, ws_options)
+        for path in out.rglob("*.py"):
+            source = path.read_text()
+            assert black.format_str(source, mode=black.Mode()) == source, path
+
+
+def test_fragment_memo_is_bounded(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("ORPC_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(_formatting, "_memo", collections.OrderedDict())
+    monkeypatch.setattr(_formatting, "memo_size", 2)
+    functions = "".join(f"def f{i}( a ):\n  return a\n" for i in range(3))
+    expected = format_python(functions, Formatting.BLACK)
+    assert format_python(functions, Formatting.FRAGMENT) == expected
+    assert len(_formatting._memo) == 2
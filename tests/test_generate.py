@@ -0,0 +1,1155 @@
+"""Test client generation."""
+import asyncio
+import concurrent.futures
+import gc
+import importlib.util
+import inspect
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from types import ModuleType
+from typing import Any
+
+import httpx
+import pytest
+import websockets
+from jinja2 import ModuleLoader
+import msgspec
+from jsonrpcobjects.errors import JSONRPCError
+from openrpc import OpenRPC, Schema
+from pydantic import ValidationError
+
+from openrpcclientgenerator import (
+    Cache,
+    Codec,
+    FileWriter,
+    Formatting,
+    generate,
+    generate_many,
+    GenerateOptions,
+    get_cache_hints,
+    is_unchanged,
+    Language,
+    load_openrpc,
+    ModelBackend,
+    ModelLayout,
+    Profiler,
+    TypeScriptStyle,
+    Validation,
+    WriteStatus,
+)
+
+# noinspection PyProtectedMember
+from openrpcclientgenerator import _common, _mock, _templates, _typescript
+
+# noinspection PyProtectedMember
+from openrpcclientgenerator._schema_index import SchemaIndex
+
+url = "http://localhost:8000/api/v1"
+spec = {
+    "openrpc": "1.2.6",
+    "info": {"title": "Test API", "version": "1.0.0"},
+    "methods": [
+        {
+            "name": "add",
+            "params": [
+                {"name": "a", "schema": {"type": "integer"}},
+                {"name": "b", "schema": {"type": "integer"}},
+            ],
+            "result": {"name": "result", "schema": {"type": "integer"}},
+        },
+        {
+            "name": "math.get_vector",
+            "params": [],
+            "result": {
+                "name": "result",
+                "schema": {"$ref": "#/components/schemas/Vector"},
+            },
+        },
+    ],
+    "components": {
+        "schemas": {
+            "Vector": {
+                "type": "object",
+                "properties": {"x": {"type": "number"}, "y": {"type": "number"}},
+            },
+            "Color": {"enum": ["red", "green"]},
+        }
+    },
+}
+
+
+def test_incremental(tmp_path: Path) -> None:
+    for language in Language:
+        rpc = OpenRPC(**spec)
+        generate(rpc, language, url, tmp_path, GenerateOptions(incremental=True))
+        mtimes = _get_mtimes(tmp_path)
+        generate(rpc, language, url, tmp_path, GenerateOptions(incremental=True))
+        assert _get_mtimes(tmp_path) == mtimes
+
+        # Changing a method changes the client but not the models.
+        rpc.methods[0].name = "sum"
+        generate(rpc, language, url, tmp_path, GenerateOptions(incremental=True))
+        changed = {
+            path.name
+            for path, mtime in _get_mtimes(tmp_path).items()
+            if mtimes.get(path) != mtime
+        }
+        assert changed == {".orpc-manifest.json", f"client.{language.value}"}
+
+
+def test_incremental_restores_altered_file(tmp_path: Path) -> None:
+    rpc = OpenRPC(**spec)
+    name = generate(
+        rpc, Language.PYTHON, url, tmp_path, GenerateOptions(incremental=True)
+    )
+    readme = tmp_path.joinpath("python", name, "README.md")
+    content = readme.read_text()
+    readme.write_text("Altered.")
+    generate(rpc, Language.PYTHON, url, tmp_path, GenerateOptions(incremental=True))
+    assert readme.read_text() == content
+
+
+def test_incremental_deletes_dropped_files(tmp_path: Path) -> None:
+    rpc = OpenRPC(**spec)
+    options = GenerateOptions(incremental=True, sync=True, mock=True)
+    name = generate(rpc, Language.PYTHON, url, tmp_path, options)
+    client_dir = tmp_path.joinpath("python", name)
+    dropped = [
+        next(client_dir.glob("*/sync_client.py")),
+        client_dir.joinpath("mock_server.py"),
+        client_dir.joinpath("mock_data.json"),
+        client_dir.joinpath("benchmark.py"),
+    ]
+    assert all(it.exists() for it in dropped)
+
+    writer = FileWriter()
+    options = GenerateOptions(incremental=True, writer=writer)
+    generate(rpc, Language.PYTHON, url, tmp_path, options)
+    assert not any(it.exists() for it in dropped)
+    assert sorted(writer.get_paths(WriteStatus.DELETED)) == sorted(dropped)
+    manifest = json.loads(client_dir.joinpath(".orpc-manifest.json").read_text())
+    assert "benchmark.py" not in manifest["files"]
+
+
+def test_writer_results(tmp_path: Path) -> None:
+    rpc = OpenRPC(**spec)
+    writer = FileWriter()
+    generate(rpc, Language.TYPESCRIPT, url, tmp_path, GenerateOptions(writer=writer))
+    assert set(writer.results.values()) == {WriteStatus.CREATED}
+    mtimes = _get_mtimes(tmp_path)
+
+    rpc.components.schemas["Vector"].properties["z"] = rpc.components.schemas[
+        "Vector"
+    ].properties["x"]
+    writer = FileWriter()
+    generate(rpc, Language.TYPESCRIPT, url, tmp_path, GenerateOptions(writer=writer))
+    assert [it.name for it in writer.get_paths(WriteStatus.UPDATED)] == ["models.ts"]
+    assert len(writer.get_paths(WriteStatus.UNCHANGED)) == len(mtimes) - 1
+    assert not writer.get_paths(WriteStatus.CREATED)
+    for path in writer.get_paths(WriteStatus.UNCHANGED):
+        assert path.stat().st_mtime_ns == mtimes[path]
+    assert not list(tmp_path.rglob("*.tmp"))
+
+
+def test_generate_many(tmp_path: Path) -> None:
+    rpc = OpenRPC(**spec)
+    other = OpenRPC(**{**spec, "info": {"title": "Other", "version": "1"}})
+    options = GenerateOptions(mock=True)
+    specs = [(rpc, url), (other, "ws://localhost:8000", options), (rpc, url)]
+    results = generate_many(specs, list(Language), tmp_path, workers=2)
+    assert [(it.spec, it.language) for it in results] == [
+        (i, language) for i in range(3) for language in Language
+    ]
+    assert [it.client_name for it in results] == [
+        "test-api-http-client",
+        "test-api-http-client",
+        "other-ws-client",
+        "other-ws-client",
+        None,
+        None,
+    ]
+    assert all(it.error is None for it in results[:4])
+    assert all("already generates" in it.error for it in results[4:])
+    assert all(it.files for it in results[:4])
+    assert not any("mock_server" in path for path in results[0].files)
+    assert any("mock_server" in path for path in results[2].files)
+
+
+def test_cli_batch_options(tmp_path: Path) -> None:
+    document = json.loads(json.dumps(spec))
+    document["methods"][0]["x-cache"] = {"ttl": 5}
+    tmp_path.joinpath("spec.json").write_text(json.dumps(document))
+    batch = [{"openrpc": "spec.json", "url": url}]
+    tmp_path.joinpath("batch.json").write_text(json.dumps(batch))
+    _run_orpc(
+        *("--batch", tmp_path.joinpath("batch.json")),
+        *("--lang", "py", "--out", tmp_path.joinpath("out")),
+        *("--workers", "1", "--sync", "--mock", "--codec", "orjson"),
+    ).check_returncode()
+    client_dir = next(tmp_path.joinpath("out", "python").iterdir())
+    assert client_dir.joinpath("mock_server.py").exists()
+    client = next(client_dir.rglob("sync_client.py")).read_text()
+    assert "import orjson" in client
+    assert '@_rpc_method("add", "full", cache=(5.0, 128))' in client
+
+
+def test_cli_invalid_validation() -> None:
+    for value, error in [
+        ("internal.*", "Expected PATTERN=VALIDATION"),
+        ("internal.*=lazy", "Invalid validation `lazy`"),
+    ]:
+        process = _run_orpc("--validation", value)
+        assert process.returncode == 2
+        assert error in process.stderr
+
+
+def test_formatting(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("ORPC_CACHE_DIR", str(tmp_path.joinpath("cache")))
+    rpc = OpenRPC(**spec)
+    outputs = {}
+    for formatting in Formatting:
+        out = tmp_path.joinpath(formatting.value)
+        generate(
+            rpc,
+            Language.PYTHON,
+            "ws://localhost",
+            out,
+            GenerateOptions(formatting=formatting),
+        )
+        outputs[formatting] = {
+            path.relative_to(out): path.read_text() for path in out.rglob("*.py")
+        }
+    assert outputs[Formatting.FRAGMENT] == outputs[Formatting.BLACK]
+    for path, content in outputs[Formatting.NONE].items():
+        compile(content, str(path), "exec")
+    assert tmp_path.joinpath("cache", "fragments.sqlite3").exists()
+
+
+def test_profiler(tmp_path: Path) -> None:
+    calls = []
+    profile_path = tmp_path.joinpath("generate.pstats")
+    profiler = Profiler(lambda *args: calls.append(args), profile_path)
+    rpc = OpenRPC(**spec)
+    generate(rpc, Language.PYTHON, url, tmp_path, GenerateOptions(profiler=profiler))
+    assert {
+        "index",
+        "types",
+        "group",
+        "render:python/client_module.j2",
+        "render:python/models.j2",
+        "format",
+        "write",
+    } <= set(profiler.phases)
+    assert profiler.phases["format"].count == 2
+    assert profiler.phases["write"].count == 6
+    assert len(calls) == sum(it.count for it in profiler.phases.values())
+    assert profile_path.exists()
+
+    results = generate_many([(rpc, url)], [Language.TYPESCRIPT], tmp_path, profile=True)
+    assert "render:typescript/client_module.j2" in results[0].phases
+
+
+def test_streaming(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("ORPC_CACHE_DIR", str(tmp_path.joinpath("cache")))
+    rpc = OpenRPC(**spec)
+    for language in Language:
+        for formatting in Formatting:
+            outputs = []
+            for streaming in (False, True):
+                out = tmp_path.joinpath(f"{language.value}-{formatting.value}")
+                out = out.joinpath(str(streaming))
+                out.mkdir(parents=True)
+                generate(
+                    rpc,
+                    language,
+                    url,
+                    out,
+                    GenerateOptions(formatting=formatting, streaming=streaming),
+                )
+                outputs.append(
+                    {it.relative_to(out): it.read_text() for it in out.rglob("*.*")}
+                )
+            assert outputs[0] == outputs[1]
+
+    writer = FileWriter()
+    generate(
+        rpc,
+        Language.TYPESCRIPT,
+        url,
+        out,
+        GenerateOptions(writer=writer, streaming=True),
+    )
+    assert set(writer.results.values()) == {WriteStatus.UNCHANGED}
+    assert not list(out.rglob("*.tmp"))
+
+
+def test_is_unchanged(tmp_path: Path) -> None:
+    source = json.dumps(spec).encode()
+    rpc = OpenRPC(**spec)
+    assert not is_unchanged(source, Language.PYTHON, url, tmp_path)
+    generate(
+        rpc,
+        Language.PYTHON,
+        url,
+        tmp_path,
+        GenerateOptions(incremental=True, source=source),
+    )
+    writer = FileWriter()
+    assert is_unchanged(
+        source, Language.PYTHON, url, tmp_path, GenerateOptions(writer=writer)
+    )
+    assert len(writer.get_paths(WriteStatus.UNCHANGED)) == 6
+    assert not is_unchanged(source, Language.TYPESCRIPT, url, tmp_path)
+    assert not is_unchanged(source + b" ", Language.PYTHON, url, tmp_path)
+
+    # A reformatted document still matches the spec digest and is
+    # recorded as the new source.
+    reformatted = json.dumps(spec, indent=2).encode()
+    generate(
+        rpc,
+        Language.PYTHON,
+        url,
+        tmp_path,
+        GenerateOptions(incremental=True, source=reformatted),
+    )
+    assert is_unchanged(reformatted, Language.PYTHON, url, tmp_path)
+
+
+def test_precompiled_templates(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("ORPC_CACHE_DIR", str(tmp_path.joinpath("cache")))
+    outputs = []
+    try:
+        for _ in range(2):
+            _templates.get_env.cache_clear()
+            env = _templates.get_env()
+            assert isinstance(env.loader, ModuleLoader)
+            out = tmp_path.joinpath(f"out{len(outputs)}")
+            generate(OpenRPC(**spec), Language.PYTHON, url, out)
+            outputs.append({it.name: it.read_text() for it in out.rglob("*.py")})
+    finally:
+        _templates.get_env.cache_clear()
+    assert outputs[0] == outputs[1]
+    assert len(list(tmp_path.joinpath("cache", "templates").iterdir())) == 1
+
+
+def test_lazy_imports() -> None:
+    code = (
+        "import sys\n"
+        "from openrpcclientgenerator import is_unchanged\n"
+        "print(sorted({'black', 'jinja2', 'openrpc'} & set(sys.modules)))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, check=True, text=True
+    ).stdout
+    assert output.strip() == "[]"
+
+
+def test_batch_calls(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    client_module = _import_client(tmp_path, monkeypatch)
+    requests = []
+
+    async def _send_and_get_json(request_json: str, _request_id: int) -> str:
+        batch = json.loads(request_json)
+        requests.append(batch)
+        responses = [
+            {"jsonrpc": "2.0", "id": it["id"], "result": sum(it["params"])}
+            for it in batch
+            if it["method"] == "add"
+        ]
+        return json.dumps(responses[::-1])
+
+    client = client_module.TestAPIClient(headers={})
+    monkeypatch.setattr(client._transport, "_send_and_get_json", _send_and_get_json)
+
+    async def _call() -> list[int]:
+        async with client.batch():
+            results = await asyncio.gather(
+                client.add(1, 2),
+                client.add(3, 4),
+                client.math.get_vector(),
+                return_exceptions=True,
+            )
+            results.append(await client.add(5, 6))
+        return results
+
+    *results, error, last = asyncio.run(_call())
+    assert [*results, last] == [3, 7, 11]
+    assert isinstance(error, JSONRPCError)
+    assert [len(it) for it in requests] == [3, 1]
+    assert not client._transport._ids
+
+
+def test_instance_transports(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    client_module = _import_client(tmp_path, monkeypatch)
+    requests = []
+
+    def _handle(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        body = json.loads(request.content)
+        result = {"x": 1, "y": 2} if body["method"] == "math.get_vector" else 3
+        return httpx.Response(
+            200, json={"jsonrpc": "2.0", "id": body["id"], "result": result}
+        )
+
+    async def _call() -> None:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(_handle)) as shared:
+            first = client_module.TestAPIClient({"tenant": "a"}, client=shared)
+            second = client_module.TestAPIClient(
+                {"tenant": "b"}, "http://other", client=shared
+            )
+            assert await first.add(1, 2) == 3
+            assert (await second.math.get_vector()).x == 1
+            await first.close()
+            assert not shared.is_closed
+
+    asyncio.run(_call())
+    assert [(str(it.url), it.headers["tenant"]) for it in requests] == [
+        (url, "a"),
+        ("http://other", "b"),
+    ]
+    client = client_module.TestAPIClient()
+    assert client.math._transport is client._transport
+    assert client_module.TestAPIClient()._transport is not client._transport
+
+
+def test_methods_named_like_client_methods(tmp_path: Path) -> None:
+    document = json.loads(json.dumps(spec))
+    for name in ("connect", "close"):
+        document["methods"].append(
+            {"name": name, "params": [], "result": {"name": "result", "schema": {}}}
+        )
+    rpc = OpenRPC(**document)
+    for server_url in (url, "ws://localhost"):
+        out = tmp_path.joinpath(server_url.split(":")[0])
+        name = generate(rpc, Language.PYTHON, server_url, out, GenerateOptions())
+        source = next(out.joinpath("python", name).rglob("client.py")).read_text()
+        client = source[source.index("class TestAPIClient") :]
+        for method in ("connect", "close"):
+            assert client.count(f"def {method}(") == 1
+            assert f'@_rpc_method("{method}")' in client
+
+
+def test_sync_client(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    client_module = _import_client(tmp_path, monkeypatch, "sync_client")
+    requests = []
+
+    def _handle(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        body = json.loads(request.content)
+        result = {"x": 1, "y": 2} if body["method"] == "math.get_vector" else 3
+        return httpx.Response(
+            200, json={"jsonrpc": "2.0", "id": body["id"], "result": result}
+        )
+
+    with httpx.Client(transport=httpx.MockTransport(_handle)) as shared:
+        client = client_module.TestAPIClient({"tenant": "a"}, client=shared)
+        assert client.add(1, 2) == 3
+        assert client.math.get_vector().y == 2
+        client.close()
+        assert not shared.is_closed
+    assert [it.headers["tenant"] for it in requests] == ["a", "a"]
+    assert not inspect.iscoroutinefunction(client_module.TestAPIClient.add)
+
+    # Clients shared by threads never reuse an id.
+    with httpx.Client(transport=httpx.MockTransport(_handle)) as shared:
+        client = client_module.TestAPIClient(client=shared)
+        requests.clear()
+        with concurrent.futures.ThreadPoolExecutor(8) as executor:
+            assert set(executor.map(lambda _: client.add(1, 2), range(200))) == {3}
+    assert len({json.loads(it.content)["id"] for it in requests}) == 200
+
+    with pytest.raises(ValueError, match="HTTP"):
+        generate(
+            OpenRPC(**spec),
+            Language.PYTHON,
+            "ws://x",
+            tmp_path,
+            GenerateOptions(sync=True),
+        )
+
+
+def test_msgspec_models(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    sync_module = _import_client(
+        tmp_path, monkeypatch, "sync_client", models=ModelBackend.MSGSPEC
+    )
+    vector_type = sys.modules["test_api_client.models"].Vector
+    assert issubclass(vector_type, msgspec.Struct)
+
+    def _respond(body: dict[str, Any]) -> dict[str, Any]:
+        if body["method"] == "add":
+            error = {"code": -32050, "message": "Server error"}
+            return {"id": body["id"], "error": error}
+        return {"id": body["id"], "result": {"x": 1.5, "y": 2}}
+
+    def _handle(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        if isinstance(body, list):
+            return httpx.Response(200, json=[_respond(it) for it in body])
+        return httpx.Response(200, json=_respond(body))
+
+    with httpx.Client(transport=httpx.MockTransport(_handle)) as shared:
+        client = sync_module.TestAPIClient(client=shared)
+        assert client.math.get_vector() == vector_type(x=1.5, y=2.0)
+        with client.validation("raw"):
+            assert client.math.get_vector() == {"x": 1.5, "y": 2}
+        with pytest.raises(JSONRPCError, match="Server error"):
+            client.add(1, 2)
+        assert not client._transport._ids
+
+    client_module = _import_client(tmp_path, monkeypatch, models=ModelBackend.MSGSPEC)
+    vector_type = sys.modules["test_api_client.models"].Vector
+
+    async def _call() -> list[Any]:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(_handle)) as shared:
+            client = client_module.TestAPIClient(client=shared)
+            vector = await client.math.get_vector()
+            async with client.batch():
+                results = await asyncio.gather(
+                    client.math.get_vector(), client.math.get_vector()
+                )
+            return [vector, *results]
+
+    assert asyncio.run(_call()) == [vector_type(x=1.5, y=2.0)] * 3
+
+
+def test_validation(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    validation = {"math.*": Validation.RAW}
+    module = _import_client(tmp_path, monkeypatch, "sync_client", validation=validation)
+    vector_type = sys.modules["test_api_client.models"].Vector
+
+    def _handle(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        result = {"x": "1.5", "y": 2} if body["method"] == "math.get_vector" else "3"
+        return httpx.Response(200, json={"id": body["id"], "result": result})
+
+    with httpx.Client(transport=httpx.MockTransport(_handle)) as shared:
+        client = module.TestAPIClient(client=shared)
+        assert client.add(1, 2) == 3
+        assert client.math.get_vector() == {"x": "1.5", "y": 2}
+        with client.validation("full"):
+            assert client.math.get_vector() == vector_type(x=1.5, y=2.0)
+        with client.validation("construct"):
+            vector = client.math.get_vector()
+            assert isinstance(vector, vector_type)
+            assert vector.x == "1.5"
+            assert client.add(1, 2) == "3"
+
+    vectors = module._construct(list[vector_type] | None, [{"x": 1, "y": 2}])
+    assert vectors == [vector_type.model_construct(x=1, y=2)]
+    assert module._construct(dict[str, vector_type], {"a": {}}) == {"a": {}}
+
+
+def test_orjson_codec(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    sync_module = _import_client(
+        tmp_path, monkeypatch, "sync_client", codec=Codec.ORJSON
+    )
+    vector_type = sys.modules["test_api_client.models"].Vector
+    requests = []
+
+    def _respond(body: dict[str, Any]) -> dict[str, Any]:
+        if body["method"] == "add" and body["params"][1] < 0:
+            error = {"code": -32050, "message": "Server error"}
+            return {"id": body["id"], "error": error}
+        result = {"x": 1.5, "y": 2} if body["method"] == "math.get_vector" else 3
+        return {"jsonrpc": "2.0", "id": body["id"], "result": result}
+
+    def _handle(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        requests.append(body)
+        if isinstance(body, list):
+            return httpx.Response(200, json=[_respond(it) for it in body])
+        return httpx.Response(200, json=_respond(body))
+
+    with httpx.Client(transport=httpx.MockTransport(_handle)) as shared:
+        client = sync_module.TestAPIClient(client=shared)
+        # Models in params are serialized by pydantic.
+        assert client.add(vector_type(x=1, y=2), 2) == 3
+        assert client.math.get_vector() == vector_type(x=1.5, y=2.0)
+        with pytest.raises(JSONRPCError, match="Server error"):
+            client.add(1, -1)
+        assert not client._transport._ids
+    assert requests[0] == {
+        "jsonrpc": "2.0",
+        "id": 1,
+        "method": "add",
+        "params": [{"x": 1.0, "y": 2.0}, 2],
+    }
+
+    client_module = _import_client(tmp_path, monkeypatch, codec=Codec.ORJSON)
+
+    async def _call() -> list[Any]:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(_handle)) as shared:
+            client = client_module.TestAPIClient(client=shared)
+            async with client.batch():
+                return await asyncio.gather(
+                    client.add(1, 2), client.add(1, -1), return_exceptions=True
+                )
+
+    result, error = asyncio.run(_call())
+    assert result == 3
+    assert isinstance(error, JSONRPCError)
+    assert len(requests[-1]) == 2
+
+
+def test_cached_methods(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    document = {
+        **spec,
+        "methods": [
+            {**spec["methods"][0], "x-cache": {"maxEntries": 1}},
+            {**spec["methods"][1], "x-cache": {"ttl": 60}},
+        ],
+    }
+    cache = get_cache_hints(document)
+    assert cache == {"add": Cache(max_entries=1), "math.get_vector": Cache(ttl=60)}
+    sync_module = _import_client(tmp_path, monkeypatch, "sync_client", cache=cache)
+    requests = []
+
+    def _handle(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        requests.append(body["method"])
+        result = {"x": 1, "y": 2} if body["method"] == "math.get_vector" else 3
+        return httpx.Response(200, json={"id": body["id"], "result": result})
+
+    with httpx.Client(transport=httpx.MockTransport(_handle)) as shared:
+        client = sync_module.TestAPIClient(client=shared)
+        assert client.math.get_vector() is client.math.get_vector()
+        with client.validation("raw"):
+            assert client.math.get_vector() == {"x": 1, "y": 2}
+        # Only the most recent result of `add` is kept.
+        for a in (1, 2, 1, 1):
+            client.add(a, 2)
+        sync_module.TestAPIClient(client=shared).math.get_vector()
+    assert requests == ["math.get_vector"] * 2 + ["add"] * 3 + ["math.get_vector"]
+
+    client_module = _import_client(tmp_path, monkeypatch, cache=cache)
+    requests.clear()
+
+    async def _call() -> list[Any]:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(_handle)) as shared:
+            client = client_module.TestAPIClient(client=shared)
+            return await asyncio.gather(*(client.math.get_vector() for _ in range(5)))
+
+    # Identical calls made together are sent once.
+    assert len(set(map(id, asyncio.run(_call())))) == 1
+    assert requests == ["math.get_vector"]
+
+
+def test_websocket_transport(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    client_module = _import_client(
+        tmp_path, monkeypatch, server_url="ws://localhost", sync=False
+    )
+    in_flight = [0, 0]
+    connections = []
+
+    async def _respond(websocket: Any, body: dict[str, Any]) -> None:
+        # Later calls are answered first.
+        await asyncio.sleep(0.01 / body["id"])
+        in_flight[0] -= 1
+        result = sum(body["params"])
+        await websocket.send(json.dumps({"id": body["id"], "result": result}))
+
+    async def _handle(websocket: Any) -> None:
+        connections.append(websocket)
+        tasks = set()
+        async for message in websocket:
+            body = json.loads(message)
+            # Calls of 0 drop the first connection without a response.
+            if body["params"][0] == 0 and len(connections) == 1:
+                await websocket.close(1011)
+                return
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight)
+            task = asyncio.create_task(_respond(websocket, body))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+    async def _call(**options: Any) -> list[Any]:
+        connections.clear()
+        async with websockets.serve(_handle, "localhost", 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            client = client_module.TestAPIClient(
+                url=f"ws://localhost:{port}", reconnect_delay=0, **options
+            )
+            await client.connect()
+            results = await asyncio.gather(*(client.add(i, 1) for i in range(1, 201)))
+            dropped = await asyncio.gather(client.add(0, 0), return_exceptions=True)
+            after = await client.add(2, 2)
+            pending = asyncio.create_task(client.add(3, 3))
+            await asyncio.sleep(0)
+            await client.close()
+            closed = await asyncio.gather(pending, return_exceptions=True)
+            return [results, *dropped, after, *closed]
+
+    results, dropped, after, closed = asyncio.run(_call(max_in_flight=20))
+    assert results == list(range(2, 202))
+    assert in_flight[1] == 20
+    assert isinstance(dropped, ConnectionError)
+    assert after == 4
+    assert isinstance(closed, ConnectionError)
+    # Calls sent before the connection was lost are sent again.
+    assert asyncio.run(_call(replay=True))[1] == 0
+    with pytest.raises(RuntimeError, match="connect"):
+        asyncio.run(client_module.TestAPIClient().add(1, 2))
+
+
+def test_websocket_invalid_messages(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    async def _handle(websocket: Any) -> None:
+        async for message in websocket:
+            body = json.loads(message)
+            for invalid in ("{", "1", "[1]", '"result"'):
+                await websocket.send(invalid)
+            await websocket.send(json.dumps({"id": body["id"], "result": 3}))
+
+    async def _call(client_module: ModuleType) -> int:
+        async with websockets.serve(_handle, "localhost", 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            client = client_module.TestAPIClient(url=f"ws://localhost:{port}")
+            await client.connect()
+            try:
+                return await asyncio.wait_for(client.add(1, 2), 5)
+            finally:
+                await client.close()
+
+    for codec in Codec:
+        client_module = _import_client(
+            tmp_path.joinpath(codec.value),
+            monkeypatch,
+            server_url="ws://localhost",
+            sync=False,
+            codec=codec,
+        )
+        caplog.clear()
+        assert asyncio.run(_call(client_module)) == 3
+        assert len(caplog.records) == 4
+
+
+def test_middleware(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    sync_module = _import_client(tmp_path, monkeypatch, "sync_client")
+    middleware = sys.modules["test_api_client.middleware"]
+    calls = []
+
+    class _Record(middleware.Middleware):
+        def before_request(self, method: str, params: list[Any]) -> None:
+            calls.append(("before", method, params))
+
+        def after_request(
+            self, method: str, seconds: float, error: BaseException | None
+        ) -> None:
+            calls.append(("after", method, isinstance(error, JSONRPCError)))
+
+    def _respond(body: dict[str, Any]) -> dict[str, Any]:
+        if body["params"] and body["params"][1] < 0:
+            error = {"code": -32050, "message": "Server error"}
+            return {"id": body["id"], "error": error}
+        result = {"x": 1, "y": 2} if body["method"] == "math.get_vector" else 3
+        return {"id": body["id"], "result": result}
+
+    def _handle(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        if isinstance(body, list):
+            return httpx.Response(200, json=[_respond(it) for it in body])
+        return httpx.Response(200, json=_respond(body))
+
+    histogram = middleware.Histogram()
+    with httpx.Client(transport=httpx.MockTransport(_handle)) as shared:
+        client = sync_module.TestAPIClient(client=shared, middleware=[histogram])
+        client.middleware.append(_Record())
+        for _ in range(10):
+            client.math.get_vector()
+        with pytest.raises(JSONRPCError, match="Server error"):
+            client.add(1, -1)
+    assert calls[-2:] == [("before", "add", [1, -1]), ("after", "add", True)]
+    report = histogram.report()
+    assert report.keys() == {"math.get_vector", "add"}
+    stats = report["math.get_vector"]
+    assert stats["count"] == 10
+    assert stats["errors"] == 0
+    assert report["add"]["errors"] == 1
+    assert 0 < stats["p50"] <= stats["p99"] <= stats["max"]
+    assert stats["decode_mean"] > 0
+    assert stats["bytes_sent"] > 0
+    assert stats["bytes_received"] > 0
+
+    client_module = _import_client(tmp_path, monkeypatch)
+    histogram = sys.modules["test_api_client.middleware"].Histogram()
+
+    async def _call() -> None:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(_handle)) as shared:
+            client = client_module.TestAPIClient(client=shared, middleware=[histogram])
+            async with client.batch():
+                await asyncio.gather(client.add(1, 2), client.math.get_vector())
+
+    asyncio.run(_call())
+    report = histogram.report()
+    assert report["add"]["count"] == report["math.get_vector"]["count"] == 1
+    # Batches are not counted towards any one method.
+    assert report["add"]["bytes_sent"] == 0
+
+
+def test_model_layout(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    def _ref(name: str) -> dict[str, Any]:
+        return {"$ref": f"#/components/schemas/{name}"}
+
+    document = {
+        **spec,
+        "methods": [
+            {"name": "geo.get_line", "params": [], "result": _result("Line")},
+            {"name": "tree.get", "params": [], "result": _result("Node")},
+            {"name": "tree.color", "params": [], "result": _result("Color")},
+        ],
+        "components": {
+            "schemas": {
+                "Color": {"enum": ["red", "green"]},
+                "Point": {"type": "object", "properties": {"color": _ref("Color")}},
+                "Line": {"type": "object", "properties": {"a": _ref("Point")}},
+                "Node": {"type": "object", "properties": {"leaf": _ref("Leaf")}},
+                "Leaf": {
+                    "type": "object",
+                    "properties": {
+                        "parent": {"anyOf": [_ref("Node"), {"type": "null"}]}
+                    },
+                },
+            }
+        },
+    }
+    name = generate(
+        OpenRPC(**document),
+        Language.PYTHON,
+        url,
+        tmp_path,
+        GenerateOptions(
+            sync=True, model_layout=ModelLayout.NAMESPACE, byte_compile=True
+        ),
+    )
+    src_dir = next(tmp_path.joinpath("python", name).glob("*/client.py")).parent
+    # Models of one group only, models shared by groups, and models
+    # referring to each other are kept together.
+    modules = {it.name for it in src_dir.joinpath("models").glob("*.py")}
+    assert modules == {"__init__.py", "_geo.py", "_shared.py", "_tree.py"}
+    assert list(src_dir.joinpath("models", "__pycache__").glob("_geo.*.pyc"))
+
+    package_spec = importlib.util.spec_from_file_location(
+        "test_api_client",
+        src_dir.joinpath("__init__.py"),
+        submodule_search_locations=[str(src_dir)],
+    )
+    monkeypatch.setitem(
+        sys.modules, "test_api_client", importlib.util.module_from_spec(package_spec)
+    )
+    try:
+        module = importlib.import_module("test_api_client.sync_client")
+        models = "test_api_client.models"
+
+        def _handle(request: httpx.Request) -> httpx.Response:
+            body = json.loads(request.content)
+            result = {"a": {"color": "red"}}
+            return httpx.Response(200, json={"id": body["id"], "result": result})
+
+        assert f"{models}._geo" not in sys.modules
+        with httpx.Client(transport=httpx.MockTransport(_handle)) as shared:
+            line = module.TestAPIClient(client=shared).geo.get_line()
+        assert line.a.color.value == "red"
+        assert f"{models}._shared" in sys.modules
+        assert f"{models}._tree" not in sys.modules
+        leaf = sys.modules[models].Leaf(parent={"leaf": {"parent": None}})
+        assert leaf.parent.leaf.parent is None
+        with pytest.raises(AttributeError):
+            _ = sys.modules[models].Vector
+    finally:
+        for it in list(sys.modules):
+            if it.startswith("test_api_client."):
+                del sys.modules[it]
+
+
+def test_model_layout_change(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    document = json.loads(json.dumps(spec))
+    vector = document["components"]["schemas"]["Vector"]
+    for layout, field in ((ModelLayout.SCHEMA, "y"), (ModelLayout.MODULE, "z")):
+        vector["properties"][field] = {"type": "number"}
+        options = GenerateOptions(model_layout=layout)
+        name = generate(OpenRPC(**document), Language.PYTHON, url, tmp_path, options)
+    src_dir = next(tmp_path.joinpath("python", name).glob("*/client.py")).parent
+    assert not src_dir.joinpath("models").exists()
+
+    package_spec = importlib.util.spec_from_file_location(
+        "test_api_client",
+        src_dir.joinpath("__init__.py"),
+        submodule_search_locations=[str(src_dir)],
+    )
+    monkeypatch.setitem(
+        sys.modules, "test_api_client", importlib.util.module_from_spec(package_spec)
+    )
+    try:
+        models = importlib.import_module("test_api_client.models")
+        assert "z" in models.Vector.model_fields
+    finally:
+        for it in list(sys.modules):
+            if it.startswith("test_api_client."):
+                del sys.modules[it]
+
+    options = GenerateOptions(model_layout=ModelLayout.SCHEMA)
+    generate(OpenRPC(**document), Language.PYTHON, url, tmp_path, options)
+    assert not src_dir.joinpath("models.py").exists()
+    assert src_dir.joinpath("models", "__init__.py").exists()
+
+
+def test_typescript_methods_named_like_client_methods(tmp_path: Path) -> None:
+    document = json.loads(json.dumps(spec))
+    for name in ("connect", "close"):
+        document["methods"].append(
+            {"name": name, "params": [], "result": {"name": "result", "schema": {}}}
+        )
+    rpc = OpenRPC(**document)
+    for style in TypeScriptStyle:
+        out = tmp_path.joinpath(style.value)
+        out.mkdir()
+        options = GenerateOptions(ts_style=style)
+        name = generate(rpc, Language.TYPESCRIPT, "ws://localhost", out, options)
+        client = out.joinpath("typescript", name, "src", "client.ts").read_text()
+        # RPC methods are kept, in place of the methods of the transport.
+        for method in ("connect", "close"):
+            assert client.count(f"public async {method}(") == 1
+            assert f"public {method}()" not in client
+        assert '"connect"' not in client.split("export class")[0]
+        if style is TypeScriptStyle.FUNCTIONS:
+            assert 'return this.transport.call("close", []);' in client
+
+
+def test_typescript_functions(tmp_path: Path) -> None:
+    rpc = OpenRPC(**spec)
+    style = TypeScriptStyle.FUNCTIONS
+    for server in (url, "ws://localhost:8000/api/v1"):
+        name = generate(
+            rpc, Language.TYPESCRIPT, server, tmp_path, GenerateOptions(ts_style=style)
+        )
+        client_dir = tmp_path.joinpath("typescript", name)
+        src = client_dir.joinpath("src")
+        assert {it.name for it in src.iterdir()} == {
+            "client.ts",
+            "index.ts",
+            "methods.ts",
+            "models.ts",
+            "transport.ts",
+        }
+        client = src.joinpath("client.ts").read_text()
+        assert "rpcClient" not in client
+        assert 'return this.transport.call("math.get_vector", []);' in client
+        methods = src.joinpath("methods.ts").read_text()
+        assert "export function add(\n  transport: Transport," in methods
+        assert 'return transport.call("add", [a, b]);' in methods
+        assert "export function mathGetVector(" in methods
+        assert "export class Transport" in src.joinpath("transport.ts").read_text()
+        package = json.loads(client_dir.joinpath("package.json").read_text())
+        assert package["sideEffects"] is False
+
+    # Function names are unique and not reserved words.
+    methods = [
+        rpc.methods[0].model_copy(update={"name": it})
+        for it in ("a.b_c", "a_b.c", "delete", "Vector")
+    ]
+    names = _typescript._get_function_names(methods, {"Vector"})
+    assert list(names.values()) == ["aBC", "aBC2", "delete2", "vector"]
+
+    source = json.dumps(spec).encode()
+    generate(
+        rpc,
+        Language.TYPESCRIPT,
+        url,
+        tmp_path,
+        GenerateOptions(incremental=True, source=source),
+    )
+    assert is_unchanged(source, Language.TYPESCRIPT, url, tmp_path)
+    assert not is_unchanged(
+        source, Language.TYPESCRIPT, url, tmp_path, GenerateOptions(ts_style=style)
+    )
+
+
+def test_method_collisions(tmp_path: Path) -> None:
+    rpc = OpenRPC(**spec)
+    rpc.methods = [
+        rpc.methods[0].model_copy(update={"name": it})
+        for it in ("a-b", "x.y", "a_b", "x", "a.b", "1st")
+    ]
+    paths = {
+        path: method.name
+        for path, method in _common.get_rpc_group("Api", rpc.methods).iter_methods()
+    }
+    # Methods named their identifier keep it, methods named as groups
+    # are numbered too.
+    assert paths == {
+        ("a_b",): "a_b",
+        ("a_b_2",): "a-b",
+        ("x_2",): "x",
+        ("n1st",): "1st",
+        ("x", "y"): "x.y",
+        ("a", "b"): "a.b",
+    }
+    reversed_group = _common.get_rpc_group("Api", rpc.methods[::-1])
+    assert {k: v.name for k, v in reversed_group.iter_methods()} == paths
+
+    name = generate(rpc, Language.PYTHON, url, tmp_path)
+    client = next(tmp_path.joinpath("python", name).glob("*/client.py")).read_text()
+    assert '@_rpc_method("a-b")\n    async def a_b_2(' in client
+    assert '@_rpc_method("a_b")\n    async def a_b(' in client
+
+
+def test_mock_examples() -> None:
+    document = json.loads(json.dumps(spec))
+    document["components"]["schemas"]["Tree"] = {
+        "type": "object",
+        "properties": {
+            "name": {"type": "string", "minLength": 8, "format": "hostname"},
+            "size": {"type": "integer", "exclusiveMinimum": 3, "maximum": 9},
+            "children": {
+                "type": "array",
+                "items": {"$ref": "#/components/schemas/Tree"},
+            },
+            "parent": {
+                "anyOf": [{"$ref": "#/components/schemas/Tree"}, {"type": "null"}]
+            },
+        },
+    }
+    document["methods"][1]["result"] = _result("Tree")
+    rpc = OpenRPC(**document)
+    data = _mock.get_mock_data(rpc, SchemaIndex(rpc))
+    assert data["methods"]["add"] == {"params": [1, 1], "result": 1}
+    # Recursive models are cut short where their schema allows.
+    assert data["methods"]["math.get_vector"]["result"] == {
+        "name": "example.com",
+        "size": 4,
+        "children": [],
+        "parent": None,
+    }
+    examples = _mock.Examples(SchemaIndex(rpc))
+    both = {"allOf": [{"properties": {"a": {"const": 1}}}, {"examples": [{"b": 2}]}]}
+    cases = [
+        ({"type": ["null", "number"], "minimum": 2}, 2.0),
+        ({"type": "boolean"}, True),
+        ({"enum": ["b", "a"]}, "b"),
+        ({"type": "string", "default": None}, None),
+        (both, {"a": 1, "b": 2}),
+    ]
+    assert [examples(Schema(**it)) for it, _ in cases] == [it for _, it in cases]
+
+
+def test_mock_server(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    _import_client(tmp_path, monkeypatch, sync=False, mock=True)
+    client_dir = tmp_path.joinpath("python", "test-api-http-client")
+    modules = {}
+    for it in ("mock_server", "benchmark"):
+        module_spec = importlib.util.spec_from_file_location(
+            it, client_dir.joinpath(f"{it}.py")
+        )
+        modules[it] = importlib.util.module_from_spec(module_spec)
+        monkeypatch.setitem(sys.modules, it, modules[it])
+        module_spec.loader.exec_module(modules[it])
+    mock_server, benchmark = modules.values()
+
+    request = {"jsonrpc": "2.0", "id": 1, "method": "math.get_vector"}
+    assert json.loads(mock_server.handle(json.dumps(request))) == {
+        "jsonrpc": "2.0",
+        "id": 1,
+        "result": {"x": 0.5, "y": 0.5},
+    }
+    notification = {"jsonrpc": "2.0", "method": "add", "params": [1, 2]}
+    batch = [notification, {**request, "id": 2, "method": "x"}]
+    responses = json.loads(mock_server.handle(json.dumps(batch)))
+    assert [it["error"]["code"] for it in responses] == [-32601]
+    assert mock_server.handle(json.dumps(notification)) is None
+    assert json.loads(mock_server.handle("{"))["error"]["code"] == -32700
+
+    async def _run() -> dict[str, Any]:
+        server = await mock_server.serve("http://localhost:0")
+        async with server:
+            port = server.sockets[0].getsockname()[1]
+            server_url = f"http://localhost:{port}/api/v1"
+            return await benchmark.run(server_url, "math.get_vector", 8, 200, 10)
+
+    result = asyncio.run(_run())
+    assert result["count"] == 200
+    assert result["errors"] == 0
+    assert result["calls_per_second"] > 0
+    assert result["p50"] <= result["p99"] <= result["max"]
+
+    rpc = OpenRPC(**spec)
+    style = TypeScriptStyle.FUNCTIONS
+    name = generate(
+        rpc,
+        Language.TYPESCRIPT,
+        url,
+        tmp_path,
+        GenerateOptions(mock=True, ts_style=style),
+    )
+    benchmark_ts = tmp_path.joinpath("typescript", name, "benchmark.ts").read_text()
+    assert '"math.get_vector": ["math", "getVector"],' in benchmark_ts
+    assert "new TestAPIClient({}, new Transport(url))" in benchmark_ts
+    assert tmp_path.joinpath("typescript", name, "mock_server.py").exists()
+
+
+def test_load_openrpc(tmp_path: Path) -> None:
+    spec_path = tmp_path.joinpath("openrpc.json")
+    spec_path.write_text(json.dumps(spec))
+    rpc = load_openrpc(spec_path)
+    assert rpc == OpenRPC(**spec)
+    assert load_openrpc(spec_path) is not rpc
+    assert gc.isenabled()
+
+    # Trusted documents with the same content share their model.
+    trusted = load_openrpc(spec_path, trusted=True)
+    assert load_openrpc(spec_path.read_bytes(), trusted=True) is trusted
+    other = json.dumps({**spec, "methods": spec["methods"][:1]}).encode()
+    assert len(load_openrpc(other, trusted=True).methods) == 1
+    with pytest.raises(ValidationError):
+        load_openrpc(b'{"openrpc": "1.2.6"}')
+
+
+def _result(name: str) -> dict[str, Any]:
+    return {"name": "result", "schema": {"$ref": f"#/components/schemas/{name}"}}
+
+
+def _import_client(
+    path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    module_name: str = "client",
+    *,
+    server_url: str = url,
+    sync: bool = True,
+    **options: Any,
+) -> ModuleType:
+    """Generate a Python client and import one of its client modules."""
+    name = generate(
+        OpenRPC(**spec),
+        Language.PYTHON,
+        server_url,
+        path,
+        GenerateOptions(sync=sync, **options),
+    )
+    src_dir = next(path.joinpath("python", name).glob("*/client.py")).parent
+    module = None
+    for it in ("models", "middleware", module_name):
+        module_spec = importlib.util.spec_from_file_location(
+            f"test_api_client.{it}", src_dir.joinpath(f"{it}.py")
+        )
+        module = importlib.util.module_from_spec(module_spec)
+        monkeypatch.setitem(sys.modules, module_spec.name, module)
+        module_spec.loader.exec_module(module)
+    return module
+
+
+def _run_orpc(*args: Any) -> subprocess.CompletedProcess[str]:
+    root = Path(__file__).parents[1]
+    return subprocess.run(
+        [sys.executable, root.joinpath("openrpcclientgenerator", "orpc"), *args],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": str(root)},
+    )
+
+
+def _get_mtimes(path: Path) -> dict[Path, int]:
+    return {it: it.stat().st_mtime_ns for it in path.rglob("*") if it.is_file()}
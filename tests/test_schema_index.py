@@ -0,0 +1,125 @@
+"""Test `$ref` resolution of the schema index."""
+import json
+from pathlib import Path
+
+from openrpc import OpenRPC
+
+from openrpcclientgenerator import generate, GenerateOptions, Language
+
+# noinspection PyProtectedMember
+from openrpcclientgenerator._schema_index import SchemaIndex
+
+# noinspection PyProtectedMember
+from openrpcclientgenerator._types import (
+    ArrayType,
+    PrimitiveType,
+    RefType,
+    TypeResolver,
+)
+
+
+def _get_rpc(schemas: dict, result: dict) -> OpenRPC:
+    return OpenRPC(
+        openrpc="1.2.6",
+        info={"title": "Test API", "version": "1.0.0"},
+        methods=[
+            {"name": "get", "params": [], "result": {"name": "r", "schema": result}}
+        ],
+        components={"schemas": schemas},
+    )
+
+
+def test_order_and_cycles() -> None:
+    rpc = _get_rpc(
+        {
+            "Tree": {
+                "type": "object",
+                "properties": {
+                    "children": {
+                        "type": "array",
+                        "items": {"$ref": "#/components/schemas/Tree"},
+                    },
+                    "leaf": {"$ref": "#/components/schemas/Leaf"},
+                },
+            },
+            "Leaf": {
+                "type": "object",
+                "properties": {"value": {"$ref": "#/components/schemas/Value"}},
+            },
+            "Value": {"type": "integer"},
+        },
+        {"$ref": "#/components/schemas/Tree"},
+    )
+    index = SchemaIndex(rpc)
+    assert list(index.models) == ["Leaf", "Tree"]
+    assert index.cyclic == {"Tree"}
+
+    resolver = TypeResolver(index)
+    tree = rpc.components.schemas["Tree"]
+    assert resolver.resolve(tree.properties["children"]) == ArrayType(RefType("Tree"))
+    # Refs to schemas that are not models are inlined.
+    leaf = rpc.components.schemas["Leaf"]
+    assert resolver.resolve(leaf.properties["value"]) == PrimitiveType("integer")
+
+
+def test_pointer_escapes_and_defs() -> None:
+    rpc = _get_rpc(
+        {
+            "a/b~c": {
+                "type": "object",
+                "properties": {"x": {"$ref": "#/components/schemas/a~1b~0c/$defs/X"}},
+                "$defs": {"X": {"enum": [1, 2]}},
+            }
+        },
+        {"$ref": "#/components/schemas/a~1b~0c"},
+    )
+    index = SchemaIndex(rpc)
+    assert list(index.models) == ["X", "a/b~c"]
+    resolver = TypeResolver(index)
+    assert resolver.resolve(rpc.methods[0].result.schema_) == RefType("a/b~c")
+
+
+def test_external_files(tmp_path: Path) -> None:
+    tmp_path.joinpath("schemas").mkdir()
+    tmp_path.joinpath("schemas", "point.json").write_text(
+        json.dumps(
+            {
+                "type": "object",
+                "properties": {"unit": {"$ref": "units.json#/Unit"}},
+            }
+        )
+    )
+    tmp_path.joinpath("schemas", "units.json").write_text(
+        json.dumps({"Unit": {"enum": ["m", "km"]}})
+    )
+    rpc = _get_rpc({}, {"$ref": "schemas/point.json"})
+    index = SchemaIndex(rpc, tmp_path)
+    assert list(index.models) == ["Unit", "Point"]
+    assert set(index.files) == {
+        tmp_path.joinpath("schemas", "point.json").resolve(),
+        tmp_path.joinpath("schemas", "units.json").resolve(),
+    }
+
+    out = tmp_path.joinpath("out")
+    for language in Language:
+        generate(
+            rpc, language, "http://localhost", out, GenerateOptions(base_path=tmp_path)
+        )
+    models = next(out.joinpath("python").rglob("models.py")).read_text()
+    assert "class Unit(Enum):" in models
+    assert "class Point(BaseModel):\n    unit: Unit" in models
+
+
+def test_incremental_tracks_external_files(tmp_path: Path) -> None:
+    point = tmp_path.joinpath("point.json")
+    point.write_text(json.dumps({"type": "object", "properties": {"x": {}}}))
+    rpc = _get_rpc({}, {"$ref": "point.json"})
+    out = tmp_path.joinpath("out")
+    args = (rpc, Language.PYTHON, "http://localhost", out)
+    generate(*args, GenerateOptions(incremental=True, base_path=tmp_path))
+    models = next(out.rglob("models.py"))
+    assert "y:" not in models.read_text()
+
+    point.write_text(json.dumps({"type": "object", "properties": {"y": {}}}))
+    generate(*args, GenerateOptions(incremental=True, base_path=tmp_path))
+    assert "y:" in models.read_text()
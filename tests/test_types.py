@@ -0,0 +1,54 @@
+"""Test language-neutral type resolution."""
+from openrpc import Schema
+
+# noinspection PyProtectedMember
+from openrpcclientgenerator import _python, _typescript
+
+# noinspection PyProtectedMember
+from openrpcclientgenerator._types import (
+    ArrayType,
+    MapType,
+    PrimitiveType,
+    RefType,
+    TypeResolver,
+    UnionType,
+)
+
+
+def test_resolve() -> None:
+    resolver = TypeResolver()
+    schema = Schema(
+        type="object",
+        additionalProperties=Schema(
+            type="array",
+            items=Schema(
+                anyOf=[
+                    Schema(**{"$ref": "#/components/schemas/Vector"}),
+                    Schema(type="string", format="uuid"),
+                ]
+            ),
+        ),
+    )
+    assert resolver.resolve(schema) == MapType(
+        ArrayType(UnionType((RefType("Vector"), PrimitiveType("string", "uuid"))))
+    )
+
+
+def test_memoized_by_schema_identity() -> None:
+    resolver = TypeResolver()
+    ref = Schema(**{"$ref": "#/components/schemas/Vector"})
+    schema = Schema(type="array", items=ref)
+    node = resolver.resolve(schema)
+    assert resolver.resolve(schema) is node
+    assert resolver.resolve(ref) is node.items
+    other_ref = Schema(**{"$ref": "#/components/schemas/Vector"})
+    assert resolver.resolve(other_ref) is node.items
+
+
+def test_shared_resolver() -> None:
+    resolver = TypeResolver()
+    schema = Schema(type="array", items=Schema(type=["string", "integer"]))
+    python = _python.PythonTypes(resolver)
+    typescript = _typescript.TypeScriptTypes(resolver)
+    assert python(schema) == "list[str | int]"
+    assert typescript(schema) == "Array<string | number>"